@@ -1,35 +1,62 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from database import db
-from models import Team, Game, BracketMatch, TournamentSettings
+from flask import Flask, Response, g, request, jsonify
+from cors import init_cors
+from database import db, configure_database, init_engines, read_only
+from data_version import ensure_data_version, conditional
+from instrumentation import init_instrumentation
+from metrics import init_metrics, collect_metrics, render_metrics, METRICS_CONTENT_TYPE
+from models import Team, Game, BracketMatch, Job, TournamentSettings
+from events import queue_event, event_stream_response
+from changes import record_changes, latest_seq, changes_payload, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from tournaments import (DEFAULT_TOURNAMENT_ID, TOURNAMENT_HEADER, tournament_id_from_request,
+                         current_tournament_id)
+from importers import UploadError, read_import_rows, validate_team_rows, validate_game_rows
+from migrations import upgrade_schema
+from schedule_filters import parse_schedule_args, after_cursor, encode_cursor, NEXT_CURSOR_HEADER
+from serializers import teams_payload, rankings_payload, schedule_payload, bracket_payload, json_response
+from brackets import check_field, advance_team, bracket_game_time, clear_bracket_rows
+from jobs import JobConflict, submit_job, fail_interrupted_jobs
+from tasks import generate_bracket_task, reset_tournament_task, import_teams_task, import_games_task
+from ranking import parse_tiebreakers
+import simulation
+from simulation import simulate_seeding, SimulatorBusy, DEFAULT_SIMULATIONS, MAX_SIMULATIONS, MAX_BRACKET_TEAMS
+from standings import (refresh_standings, rerank_standings, rebuild_team_stats,
+                       new_team_deltas, fold_score_change, apply_team_deltas)
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 
 def create_app():
     app = Flask(__name__)
     # Configure CORS with explicit headers and handle all URL patterns
-    CORS(app, 
-         resources={r"/*": {
-             "origins": ["http://localhost:8080", "http://localhost", 
-                         "http://localhost:80", "http://127.0.0.1:8080", 
-                        "http://ec2-44-194-164-99.compute-1.amazonaws.com",
-                        "http://ec2-44-194-164-99.compute-1.amazonaws.com:80"],
-             "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Requested-With"],
-             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-             "expose_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Origin", 
-                             "Access-Control-Allow-Methods", "Access-Control-Allow-Headers"]
-         }},
-         supports_credentials=False)
+    init_cors(app)
     
-    # Configure SQLite database
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tournament.db'
+    # Configure SQLite database (DATABASE_URL overrides the default file)
+    configure_database(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
     # Initialize the database with the app
     db.init_app(app)
+    init_engines(app)
+    init_instrumentation(app)
+    init_metrics(app)
     
     # Create tables
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        
+        # Every database has the default tournament, which owns rows created before tournaments existed
+        if db.session.get(TournamentSettings, DEFAULT_TOURNAMENT_ID) is None:
+            db.session.add(TournamentSettings(id=DEFAULT_TOURNAMENT_ID, name="Baseball Tournament"))
+        ensure_data_version()
+        
+        # No job survives a restart; nothing is running yet
+        fail_interrupted_jobs()
+        
+        # Backfill the standings read model for databases created before it existed
+        for tournament_id in db.session.execute(db.select(Team.tournament_id).distinct()).scalars().all():
+            refresh_standings(tournament_id)
+        db.session.commit()
     
     return app
 
@@ -41,10 +68,23 @@ def handle_preflight():
     if request.method == 'OPTIONS':
         response = app.make_default_options_response()
         response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept,X-Requested-With')
+        response.headers.add('Access-Control-Allow-Headers', f'Content-Type,Authorization,Accept,X-Requested-With,{TOURNAMENT_HEADER}')
         response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,OPTIONS,PATCH')
         return response
 
+# Scope every request to one tournament (X-Tournament-ID header or ?tournament_id=)
+@app.before_request
+def resolve_tournament():
+    try:
+        g.tournament_id = tournament_id_from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Reads of an unknown tournament simply find nothing; writes must not create orphans
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and request.endpoint != 'create_tournament':
+        if db.session.get(TournamentSettings, g.tournament_id) is None:
+            return jsonify({"error": f"Tournament {g.tournament_id} not found"}), 404
+
 # Basic route
 @app.route('/')
 def index():
@@ -52,15 +92,16 @@ def index():
 
 # Team routes
 @app.route('/api/teams', methods=['GET'])
+@read_only
+@conditional
 def get_teams():
-    teams = Team.query.all()
-    return jsonify([team.to_dict() for team in teams])
+    return json_response(teams_payload(current_tournament_id()))
 
 @app.route('/teams', methods=['GET'])
+@read_only
 def get_teams_alt():
     # Alternative endpoint for compatibility
-    teams = Team.query.all()
-    return jsonify([team.to_dict() for team in teams])
+    return get_teams()
 
 @app.route('/api/teams', methods=['POST'])
 def add_team():
@@ -73,7 +114,9 @@ def add_team():
         if 'name' not in data:
             return jsonify({"error": "Team name is required"}), 400
             
+        tournament_id = current_tournament_id()
         new_team = Team(
+            tournament_id=tournament_id,
             name=data['name'],
             wins=data.get('wins', 0),
             losses=data.get('losses', 0),
@@ -83,12 +126,39 @@ def add_team():
             games_played=data.get('games_played', 0)
         )
         db.session.add(new_team)
+        db.session.flush()
+        refresh_standings(tournament_id, [new_team.id])
+        queue_event('team', new_team.to_dict())
+        _queue_standings_event()
         db.session.commit()
         return jsonify(new_team.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/teams/bulk', methods=['POST'])
+def add_teams_bulk():
+    """Queue an import of many teams from a JSON array or a CSV upload, validated up front"""
+    try:
+        rows = read_import_rows('teams')
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if not rows:
+        return jsonify({"error": "No teams provided"}), 400
+    
+    # Validate every row before touching the database; one bad row rejects the batch
+    tournament_id = current_tournament_id()
+    values, errors = validate_team_rows(rows, tournament_id)
+    if errors:
+        return jsonify({
+            "error": f"{len(errors)} of {len(rows)} rows failed validation; no teams were imported",
+            "results": errors
+        }), 400
+    
+    # Inserted in one transaction by a background job
+    return _submit_job('import_teams', import_teams_task, values=values)
+
 @app.route('/teams', methods=['POST'])
 def add_team_alt():
     # Alternative endpoint for compatibility
@@ -97,8 +167,13 @@ def add_team_alt():
 @app.route('/api/teams/<int:team_id>', methods=['DELETE'])
 def delete_team(team_id):
     try:
-        team = Team.query.get_or_404(team_id)
+        tournament_id = current_tournament_id()
+        team = Team.query.filter_by(id=team_id, tournament_id=tournament_id).first_or_404()
         db.session.delete(team)
+        rerank_standings(tournament_id)
+        record_changes('team', [team_id], deleted=True)
+        queue_event('team_deleted', {'id': team_id})
+        _queue_standings_event()
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -110,284 +185,112 @@ def delete_team_alt(team_id):
     # Alternative endpoint for compatibility
     return delete_team(team_id)
 
+def _rankings():
+    """Build the rankings payload from the standings table"""
+    # Standings are maintained by the write routes, so this is one ordered read
+    return rankings_payload(current_tournament_id())
+
+def _queue_standings_event():
+    """Push the refreshed rankings to live clients once the transaction commits"""
+    db.session.flush()
+    queue_event('standings', _rankings())
+
 # Rankings endpoint
 @app.route('/rankings', methods=['GET'])
+@read_only
+@conditional
 def get_rankings():
     try:
-        # Fetch all teams
-        teams = Team.query.all()
-        
-        # Calculate winning percentage and points for each team
-        for team in teams:
-            if team.games_played > 0:
-                team.win_percentage = round(team.wins / team.games_played, 3)
-            else:
-                team.win_percentage = 0.0
-            
-            # Calculate points: 2 for win, 1 for tie, 0 for loss
-            team.points = (2 * team.wins) + (1 * team.ties)
-        
-        # Sort teams: 
-        # 1. By points (descending)
-        # 2. By runs allowed (ascending - fewer runs against is better)
-        ranked_teams = sorted(
-            teams, 
-            key=lambda t: (
-                -(t.points or 0),  # Negative for descending order
-                t.runs_allowed or 0  # Ascending order (fewer runs allowed is better)
-            )
-        )
-        
-        # Create rankings with rank attribute
-        rankings_data = []
-        for index, team in enumerate(ranked_teams):
-            team_data = team.to_dict()
-            team_data['rank'] = index + 1  # Add rank (1-based)
-            
-            # Add win percentage and points to the response
-            if team.games_played > 0:
-                team_data['win_percentage'] = round(team.wins / team.games_played, 3)
-            else:
-                team_data['win_percentage'] = 0.0
-                
-            team_data['points'] = (2 * team.wins) + (1 * team.ties)
-            
-            rankings_data.append(team_data)
-        
-        return jsonify(rankings_data)
+        return json_response(_rankings())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/standings/rebuild', methods=['POST'])
+def rebuild_standings():
+    """Recompute team stats from completed games and return the diff against the stored counters"""
+    try:
+        data = request.get_json(silent=True) or {}
+        report = rebuild_team_stats(current_tournament_id(), dry_run=bool(data.get('dry_run', False)))
+        if report['teams_changed'] and not report['dry_run']:
+            _queue_standings_event()
+        db.session.commit()
+        return jsonify(report)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/standings/seeding-odds', methods=['GET'])
+@read_only
+@conditional
+def get_seeding_odds():
+    """Monte Carlo odds of each bracket seed over the remaining pool games (see simulate_seeding)"""
+    try:
+        simulations = int(request.args.get('simulations', DEFAULT_SIMULATIONS))
+        team_count = int(request.args.get('teams', 6))
+        seed = int(request.args.get('seed', 0))
+    except ValueError:
+        return jsonify({"error": "simulations, teams and seed must be integers"}), 400
+    if not 1 <= simulations <= MAX_SIMULATIONS:
+        return jsonify({"error": f"simulations must be between 1 and {MAX_SIMULATIONS}"}), 400
+    if not 2 <= team_count <= MAX_BRACKET_TEAMS:
+        return jsonify({"error": f"teams must be between 2 and {MAX_BRACKET_TEAMS}"}), 400
+    if seed < 0:
+        return jsonify({"error": "seed must not be negative"}), 400
+    
+    try:
+        return json_response(simulate_seeding(current_tournament_id(), simulations, team_count, seed))
+    except SimulatorBusy as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _bracket_rounds():
+    """Build the bracket payload from one match query and one batched team query"""
+    return bracket_payload(current_tournament_id())
+
 # Bracket endpoint
 @app.route('/brackets', methods=['GET'])
+@read_only
+@conditional
 def get_bracket():
     try:
         # Get all bracket matches organized by rounds
-        matches = BracketMatch.query.order_by(BracketMatch.round_number, BracketMatch.match_display_id).all()
-        
-        # If no matches exist, return empty structure
-        if not matches:
-            return jsonify({"rounds": {}})
-        
-        # Organize matches by round
-        rounds = {}
-        for match in matches:
-            round_num = str(match.round_number)
-            if round_num not in rounds:
-                rounds[round_num] = []
-            
-            # Get team data if teams exist
-            team1 = Team.query.get(match.team1_id) if match.team1_id else None
-            team2 = Team.query.get(match.team2_id) if match.team2_id else None
-            winner = Team.query.get(match.winner_id) if match.winner_id else None
-            
-            # Create team objects with seed info
-            team1_data = None
-            team2_data = None
-            
-            if team1:
-                team1_data = team1.to_dict()
-                team1_data['seed'] = match.team1_seed
-                
-            if team2:
-                team2_data = team2.to_dict()
-                team2_data['seed'] = match.team2_seed
-            
-            match_data = {
-                'matchId': match.match_display_id,
-                'round': match.round_number,
-                'team1': team1_data,
-                'team2': team2_data,
-                'team1_score': match.team1_score,
-                'team2_score': match.team2_score,
-                'winner': winner.to_dict() if winner else None,
-                'status': match.status
-            }
-            rounds[round_num].append(match_data)
-        
-        return jsonify({"rounds": rounds})
+        return json_response({"rounds": _bracket_rounds()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/brackets/generate', methods=['POST'])
 def generate_bracket():
-    """Generate a new tournament bracket with proper seeding for a 6-team format"""
+    """Queue generation of a new tournament bracket for any field size, single or double elimination"""
+    data = request.get_json(silent=True) or {}
+    bracket_format = data.get('format', 'single')
+    if bracket_format not in ('single', 'double'):
+        return jsonify({"error": "Bracket format must be 'single' or 'double'"}), 400
     try:
-        # Clear existing bracket data
-        BracketMatch.query.delete()
-        
-        # Delete any existing bracket games
-        Game.query.filter_by(game_type='Bracket').delete()
-        
-        db.session.commit()
-        
-        # Fetch teams
-        teams = Team.query.all()
-        
-        # Calculate winning percentage and points for each team
-        for team in teams:
-            if team.games_played > 0:
-                team.win_percentage = round(team.wins / team.games_played, 3)
-            else:
-                team.win_percentage = 0.0
-                
-            # Calculate points: 2 for win, 1 for tie, 0 for loss
-            team.points = (2 * team.wins) + (1 * team.ties)
-                
-        # Sort teams by points (descending), then runs allowed (ascending)
-        seeded_teams = sorted(
-            teams, 
-            key=lambda t: (
-                -(t.points or 0),
-                t.runs_allowed or 0,
-                -(t.run_differential or 0),
-                -(t.runs_scored or 0)
-            )
-        )
-        
-        # Check if we have enough teams
-        if len(seeded_teams) < 6:
-            return jsonify({"error": "Not enough teams to create a 6-team bracket. Add at least 6 teams."}), 400
-        
-        # Limit to 6 teams
-        seeded_teams = seeded_teams[:6]
-        
-        # Create bracket matches
-        match_id = 1
-        current_date = datetime.now().date()  # Default date for bracket games
-        
-        # Create Round 1: (3 vs 6) and (4 vs 5)
-        # Match 1: Seed 3 vs Seed 6
-        match1 = BracketMatch(
-            match_display_id=match_id,
-            round_number=1,
-            team1_id=seeded_teams[2].id,  # Seed 3
-            team2_id=seeded_teams[5].id,  # Seed 6
-            team1_score=None,
-            team2_score=None,
-            team1_seed=3,
-            team2_seed=6,
-            winner_id=None,
-            status='Scheduled'
-        )
-        
-        db.session.add(match1)
-        
-        # Create a corresponding game in the schedule
-        game1 = Game(
-            team1_id=seeded_teams[2].id,
-            team2_id=seeded_teams[5].id,
-            date=current_date,
-            time=datetime.strptime('12:00', '%H:%M').time(),
-            field='Bracket Field',
-            status='Scheduled',
-            game_type='Bracket',
-            bracket_match_id=match_id
-        )
-        db.session.add(game1)
-        
-        match_id += 1
-        
-        # Match 2: Seed 4 vs Seed 5
-        match2 = BracketMatch(
-            match_display_id=match_id,
-            round_number=1,
-            team1_id=seeded_teams[3].id,  # Seed 4
-            team2_id=seeded_teams[4].id,  # Seed 5
-            team1_score=None,
-            team2_score=None,
-            team1_seed=4,
-            team2_seed=5,
-            winner_id=None,
-            status='Scheduled'
-        )
-        
-        db.session.add(match2)
-        
-        # Create a corresponding game in the schedule
-        game2 = Game(
-            team1_id=seeded_teams[3].id,
-            team2_id=seeded_teams[4].id,
-            date=current_date,
-            time=datetime.strptime('14:00', '%H:%M').time(),
-            field='Bracket Field',
-            status='Scheduled',
-            game_type='Bracket',
-            bracket_match_id=match_id
-        )
-        db.session.add(game2)
-        
-        match_id += 1
-        
-        # Create Round 2: (Winner of 3 vs 6 plays 1) and (Winner of 4 vs 5 plays 2)
-        # Match 3: Seed 1 vs Winner of Match 1
-        match3 = BracketMatch(
-            match_display_id=match_id,
-            round_number=2,
-            team1_id=seeded_teams[0].id,  # Seed 1
-            team2_id=None,  # Will be filled with winner of Match 1
-            team1_score=None,
-            team2_score=None,
-            team1_seed=1,
-            team2_seed=None,  # Will be filled later
-            winner_id=None,
-            status='Pending'
-        )
-        
-        db.session.add(match3)
-        match_id += 1
-        
-        # Match 4: Seed 2 vs Winner of Match 2
-        match4 = BracketMatch(
-            match_display_id=match_id,
-            round_number=2,
-            team1_id=seeded_teams[1].id,  # Seed 2
-            team2_id=None,  # Will be filled with winner of Match 2
-            team1_score=None,
-            team2_score=None,
-            team1_seed=2,
-            team2_seed=None,  # Will be filled later
-            winner_id=None,
-            status='Pending'
-        )
-        
-        db.session.add(match4)
-        match_id += 1
-        
-        # Create Round 3: Championship match between winners of Round 2
-        match5 = BracketMatch(
-            match_display_id=match_id,
-            round_number=3,
-            team1_id=None,  # Will be filled with winner of Match 3
-            team2_id=None,  # Will be filled with winner of Match 4
-            team1_score=None,
-            team2_score=None,
-            team1_seed=None,  # Will be filled later
-            team2_seed=None,  # Will be filled later
-            winner_id=None,
-            status='Pending'
-        )
-        
-        db.session.add(match5)
-        
-        db.session.commit()
-        
-        # Return the generated bracket
-        return get_bracket()
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+        # The field used to be fixed at the top 6 teams, which stays the default
+        team_count = int(data.get('teams', 6))
+        check_field(team_count, double_elimination=(bracket_format == 'double'))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Check if we have enough teams; the job plans the bracket
+    if Team.query.filter_by(tournament_id=current_tournament_id()).count() < team_count:
+        return jsonify({"error": f"Not enough teams to create a {team_count}-team bracket. Add at least {team_count} teams."}), 400
+    
+    return _submit_job('generate_bracket', generate_bracket_task, team_count=team_count, bracket_format=bracket_format)
 
 @app.route('/brackets/clear', methods=['POST'])
 def clear_bracket():
     """Clear the tournament bracket without generating a new one"""
     try:
-        # Delete all bracket matches
-        BracketMatch.query.delete()
-        
-        # Also delete all bracket games from the schedule
-        Game.query.filter_by(game_type='Bracket').delete()
+        # Delete all bracket matches and their games from the schedule
+        clear_bracket_rows(current_tournament_id())
         
+        queue_event('bracket', {'rounds': {}})
+        queue_event('schedule', {'reason': 'bracket'})
         db.session.commit()
         return jsonify({"message": "Tournament bracket cleared successfully", "rounds": {}})
     except Exception as e:
@@ -396,12 +299,13 @@ def clear_bracket():
 
 @app.route('/brackets/match/<int:match_id>', methods=['PATCH'])
 def update_bracket_match(match_id):
-    """Update a bracket match score and advance winner according to the 6-team bracket format"""
+    """Update a bracket match score and advance the winner (and loser) through the advancement table"""
     try:
         data = request.get_json()
+        tournament_id = current_tournament_id()
         
         # Find the match
-        match = BracketMatch.query.filter_by(match_display_id=match_id).first()
+        match = BracketMatch.query.filter_by(tournament_id=tournament_id, match_display_id=match_id).first()
         if not match:
             return jsonify({"error": f"Match ID {match_id} not found"}), 404
             
@@ -428,82 +332,61 @@ def update_bracket_match(match_id):
         if team1_score > team2_score:
             match.winner_id = match.team1_id
             winner_seed = match.team1_seed
+            loser_id, loser_seed = match.team2_id, match.team2_seed
         elif team2_score > team1_score:
             match.winner_id = match.team2_id
             winner_seed = match.team2_seed
+            loser_id, loser_seed = match.team1_id, match.team1_seed
         else:
             return jsonify({"error": "There must be a winner in bracket play"}), 400
         
         # Update the corresponding game in the schedule
-        game = Game.query.filter_by(bracket_match_id=match_id).first()
+        changed_games = []
+        game = Game.query.filter_by(tournament_id=tournament_id, bracket_match_id=match_id).first()
         if game:
             game.team1_score = team1_score
             game.team2_score = team2_score
             game.status = 'Completed'
+            changed_games.append(game)
             
-        # Advance the winner to the next round based on our 6-team format
-        next_match = None
-        next_match_position = None
-        
-        # For the custom 6-team bracket:
-        # Match 1 (3 vs 6) winner goes to Match 3 as team2 to play seed 1
-        # Match 2 (4 vs 5) winner goes to Match 4 as team2 to play seed 2
-        # Match 3 winner goes to Match 5 as team1
-        # Match 4 winner goes to Match 5 as team2
-        
-        if match.round_number == 1:
-            if match.match_display_id == 1:  # Match 1 (3 vs 6)
-                next_match = BracketMatch.query.filter_by(match_display_id=3).first()  # Match 3
-                next_match_position = 1  # Team 2 position
-            elif match.match_display_id == 2:  # Match 2 (4 vs 5)
-                next_match = BracketMatch.query.filter_by(match_display_id=4).first()  # Match 4
-                next_match_position = 1  # Team 2 position
-        elif match.round_number == 2:
-            if match.match_display_id == 3:  # Match 3 (1 vs winner of 3/6)
-                next_match = BracketMatch.query.filter_by(match_display_id=5).first()  # Match 5
-                next_match_position = 0  # Team 1 position
-            elif match.match_display_id == 4:  # Match 4 (2 vs winner of 4/5)
-                next_match = BracketMatch.query.filter_by(match_display_id=5).first()  # Match 5
-                next_match_position = 1  # Team 2 position
-        
-        # If there is a next match, advance the winner
-        if next_match:
-            winner_team = Team.query.get(match.winner_id)
+        # Advance the winner (and, in double elimination, the loser) using the
+        # next-match table stored on the match: one UPDATE per team, no lookups
+        advancing = [
+            (match.winner_next_match, match.winner_next_slot, match.winner_id, winner_seed),
+            (match.loser_next_match, match.loser_next_slot, loser_id, loser_seed)
+        ]
+        record_changes('bracket_match', [match_id] + [next_match_id for next_match_id, _, _, _ in advancing])
+        for next_match_id, next_slot, team_id, seed in advancing:
+            if next_match_id is None:
+                continue
+            team1_id, team2_id, status = advance_team(tournament_id, next_match_id, next_slot, team_id, seed)
             
-            if next_match_position == 0:  # Team 1 position
-                next_match.team1_id = match.winner_id
-                next_match.team1_seed = winner_seed
-            else:  # Team 2 position
-                next_match.team2_id = match.winner_id
-                next_match.team2_seed = winner_seed
-                
-            # If both teams are assigned, update status and create game
-            if next_match.team1_id is not None and next_match.team2_id is not None:
-                next_match.status = 'Scheduled'
-                
-                # Create a game in the schedule for the next match
-                existing_game = Game.query.filter_by(bracket_match_id=next_match.match_display_id).first()
-                
-                if not existing_game:
-                    # Get the team objects for the game
-                    team1 = Team.query.get(next_match.team1_id)
-                    team2 = Team.query.get(next_match.team2_id)
-                    
-                    if team1 and team2:
-                        game = Game(
-                            team1_id=next_match.team1_id,
-                            team2_id=next_match.team2_id,
-                            date=datetime.now().date(),
-                            time=datetime.strptime('12:00', '%H:%M').time(),  # Default time
-                            field='Bracket Field',
-                            status='Scheduled',
-                            game_type='Bracket',
-                            bracket_match_id=next_match.match_display_id
-                        )
-                        db.session.add(game)
-        
+            # Once both teams are known, put the next match on the schedule
+            if status == 'Scheduled':
+                game = Game(
+                    tournament_id=tournament_id,
+                    team1_id=team1_id,
+                    team2_id=team2_id,
+                    date=datetime.now().date(),
+                    time=bracket_game_time(0),  # Default time
+                    field='Bracket Field',
+                    status='Scheduled',
+                    game_type='Bracket',
+                    bracket_match_id=next_match_id
+                )
+                db.session.add(game)
+                changed_games.append(game)
+        
+        db.session.flush()
+        record_changes('game', [changed_game.id for changed_game in changed_games])
+        rounds = _bracket_rounds()
+        queue_event('bracket', {'rounds': rounds})
+        for changed_game in changed_games:
+            queue_event('game', changed_game.to_dict())
         db.session.commit()
-        return jsonify({"message": "Match updated successfully"})
+        
+        # Return the updated bracket through the same batched read path
+        return jsonify({"message": "Match updated successfully", "rounds": rounds})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -537,33 +420,19 @@ def add_game_score():
     if team1_id == team2_id:
         return jsonify({'error': 'A team cannot play against itself'}), 400
 
-    team1 = Team.query.get(team1_id)
-    team2 = Team.query.get(team2_id)
-
-    if not team1 or not team2:
+    tournament_id = current_tournament_id()
+    if Team.query.filter(Team.tournament_id == tournament_id, Team.id.in_([team1_id, team2_id])).count() != 2:
         return jsonify({'error': 'One or both teams not found'}), 404
 
-    # Update team stats (simplified example - adjust logic as needed)
-    team1.games_played += 1
-    team2.games_played += 1
-    team1.runs_scored += team1_score
-    team1.runs_allowed += team2_score
-    team2.runs_scored += team2_score
-    team2.runs_allowed += team1_score
-
-    if team1_score > team2_score:
-        team1.wins += 1
-        team2.losses += 1
-    elif team2_score > team1_score:
-        team2.wins += 1
-        team1.losses += 1
-
-    team1.run_differential = team1.runs_scored - team1.runs_allowed
-    team2.run_differential = team2.runs_scored - team2.runs_allowed
-
     try:
         # Note: We are not creating a Game record here, just updating teams.
         # If you need to store game records, add the Game model creation here.
+        # Team stats change through SQL increments rather than read-modify-write
+        deltas = fold_score_change(new_team_deltas(), team1_id, team2_id, (None, None, 'Scheduled'),
+                                   (team1_score, team2_score, 'Completed'))
+        apply_team_deltas(deltas)
+        refresh_standings(tournament_id, [team1_id, team2_id])
+        _queue_standings_event()
         db.session.commit()
         return jsonify({'message': 'Game score processed and team stats updated successfully'}), 201
     except Exception as e:
@@ -572,20 +441,40 @@ def add_game_score():
 
 # --- Schedule Management Endpoints ---
 
+def _schedule():
+    """Build the schedule payload, ordered by date and time"""
+    # Both team names come from the same query
+    return schedule_payload(current_tournament_id())
+
 @app.route('/api/schedule', methods=['GET'])
+@read_only
+@conditional
 def get_schedule():
-    """Get all scheduled games"""
+    """Get scheduled games, optionally filtered and one page at a time (see parse_schedule_args)"""
     try:
-        games = Game.query.order_by(Game.date, Game.time).all()
-        return jsonify([game.to_dict() for game in games])
+        conditions, cursor, limit = parse_schedule_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        if cursor is not None:
+            conditions.append(after_cursor(cursor))
+        # One extra row tells whether another page follows
+        games = schedule_payload(current_tournament_id(), conditions, limit + 1 if limit else None)
+        response = json_response(games[:limit])
+        if limit and len(games) > limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(games[limit - 1])
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/schedule/<int:game_id>', methods=['GET'])
+@read_only
+@conditional
 def get_game(game_id):
     """Get a specific game by ID"""
     try:
-        game = Game.query.get_or_404(game_id)
+        game = Game.query.filter_by(id=game_id, tournament_id=current_tournament_id()).first_or_404()
         return jsonify(game.to_dict())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -614,14 +503,13 @@ def create_game():
         if team1_id == team2_id:
             return jsonify({'error': 'A team cannot play against itself'}), 400
             
-        team1 = Team.query.get(team1_id)
-        team2 = Team.query.get(team2_id)
-        
-        if not team1 or not team2:
+        tournament_id = current_tournament_id()
+        if Team.query.filter(Team.tournament_id == tournament_id, Team.id.in_([team1_id, team2_id])).count() != 2:
             return jsonify({'error': 'One or both teams not found'}), 404
         
         # Create new game
         new_game = Game(
+            tournament_id=tournament_id,
             team1_id=team1_id,
             team2_id=team2_id,
             date=game_date,
@@ -633,20 +521,61 @@ def create_game():
         )
         
         db.session.add(new_game)
+        db.session.flush()
+        record_changes('game', [new_game.id])
+        game_data = new_game.to_dict()
+        queue_event('game', game_data)
         db.session.commit()
         
-        return jsonify(new_game.to_dict()), 201
+        return jsonify(game_data), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/schedule/bulk', methods=['POST'])
+def create_games_bulk():
+    """Queue an import of many scheduled games from a JSON array or a CSV upload, validated up front"""
+    try:
+        rows = read_import_rows('games')
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if not rows:
+        return jsonify({"error": "No games provided"}), 400
+    
+    try:
+        # Parse and validate the whole batch first; any bad row rejects all of it
+        values, errors = validate_game_rows(rows, current_tournament_id())
+        if errors:
+            return jsonify({
+                "error": f"{len(errors)} of {len(rows)} rows failed validation; no games were imported",
+                "results": errors
+            }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
+    
+    # Inserted in one transaction by a background job
+    return _submit_job('import_games', import_games_task, values=values)
+
+def _game_conflict(game_id):
+    """409 for a game someone else changed first, with the game as it is now"""
+    db.session.rollback()
+    game = Game.query.filter_by(id=game_id, tournament_id=current_tournament_id()).first()
+    return jsonify({'error': 'Game was changed by someone else; reload it and try again',
+                    'game': game.to_dict() if game else None}), 409
 
 @app.route('/api/schedule/<int:game_id>', methods=['PUT'])
 def update_game(game_id):
     """Update a scheduled game"""
     try:
-        game = Game.query.get_or_404(game_id)
+        game = Game.query.filter_by(id=game_id, tournament_id=current_tournament_id()).first_or_404()
         data = request.get_json()
         
+        # A client that read the game at an older version is editing over someone else's change
+        if 'version' in data and data['version'] != game.version:
+            return _game_conflict(game_id)
+        
         if 'team1_id' in data:
             game.team1_id = int(data['team1_id'])
             
@@ -671,8 +600,22 @@ def update_game(game_id):
         if 'status' in data:
             game.status = data['status']
         
+        # Teams can only be swapped for teams of the same tournament
+        if 'team1_id' in data or 'team2_id' in data:
+            team_count = Team.query.filter(Team.tournament_id == game.tournament_id,
+                                           Team.id.in_([game.team1_id, game.team2_id])).count()
+            if team_count != 2:
+                db.session.rollback()
+                return jsonify({'error': 'One or both teams not found'}), 404
+        
+        # Reload the team relationships in case the team IDs changed
+        db.session.flush()
+        db.session.expire(game, ['team1', 'team2'])
+        record_changes('game', [game.id])
+        game_data = game.to_dict()
+        queue_event('game', game_data)
         db.session.commit()
-        return jsonify(game.to_dict())
+        return jsonify(game_data)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -681,8 +624,10 @@ def update_game(game_id):
 def delete_game(game_id):
     """Delete a scheduled game"""
     try:
-        game = Game.query.get_or_404(game_id)
+        game = Game.query.filter_by(id=game_id, tournament_id=current_tournament_id()).first_or_404()
         db.session.delete(game)
+        record_changes('game', [game_id], deleted=True)
+        queue_event('game_deleted', {'id': game_id})
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -701,84 +646,138 @@ def update_game_score(game_id):
         return response
         
     try:
-        game = Game.query.get_or_404(game_id)
+        game = Game.query.filter_by(id=game_id, tournament_id=current_tournament_id()).first_or_404()
         data = request.get_json()
         
         if not data or not all(field in data for field in ['team1_score', 'team2_score']):
             return jsonify({'error': 'Missing required fields: team1_score, team2_score'}), 400
         
-        team1 = Team.query.get(game.team1_id)
-        team2 = Team.query.get(game.team2_id)
+        # A client that read the game at an older version is scoring over someone else's change
+        if 'version' in data and data['version'] != game.version:
+            return _game_conflict(game_id)
         
-        if not team1 or not team2:
+        if Team.query.filter(Team.tournament_id == game.tournament_id,
+                             Team.id.in_([game.team1_id, game.team2_id])).count() != 2:
             return jsonify({'error': 'One or both teams not found'}), 404
             
-        # First, handle the case where the game already has scores
-        # We need to reverse the previous score's effect on team stats
-        if game.team1_score is not None and game.team2_score is not None and game.status == 'Completed':
-            # Subtract previous scores from team stats
-            team1.runs_scored -= game.team1_score
-            team1.runs_allowed -= game.team2_score
-            team2.runs_scored -= game.team2_score
-            team2.runs_allowed -= game.team1_score
-            
-            # Decrement games_played as we are reversing a completed game
-            team1.games_played -= 1
-            team2.games_played -= 1
-            
-            # Reverse win/loss/tie records
-            if game.team1_score > game.team2_score:
-                team1.wins -= 1
-                team2.losses -= 1
-            elif game.team2_score > game.team1_score:
-                team2.wins -= 1
-                team1.losses -= 1
-            else: # It was a tie
-                team1.ties -= 1
-                team2.ties -= 1
-                
+        old_result = (game.team1_score, game.team2_score, game.status)
+        
         # Update game scores
         game.team1_score = data['team1_score']
         game.team2_score = data['team2_score']
         
         # Also update status if provided
-        old_status = game.status
         if 'status' in data:
             game.status = data['status']
         else:
             # If status not provided, set to Completed when scores are updated
             game.status = 'Completed'
+        
+        # Reverse the previous result (if it counted) and apply the new one as
+        # SQL increments, so concurrent updates to the same team cannot be lost
+        deltas = new_team_deltas()
+        if game.is_pool_play:
+            fold_score_change(deltas, game.team1_id, game.team2_id, old_result,
+                              (game.team1_score, game.team2_score, game.status))
+        db.session.flush()
+        apply_team_deltas(deltas)
             
-        # Now update team stats with new scores
-        if game.status == 'Completed':
-            # If this is a newly completed game, increment games_played
-            if old_status != 'Completed':
-                team1.games_played += 1
-                team2.games_played += 1
-                
-            # Add new scores to team stats
-            team1.runs_scored += game.team1_score
-            team1.runs_allowed += game.team2_score
-            team2.runs_scored += game.team2_score
-            team2.runs_allowed += game.team1_score
-            
-            # Update win/loss/tie records
-            if game.team1_score > game.team2_score:
-                team1.wins += 1
-                team2.losses += 1
-            elif game.team2_score > game.team1_score:
-                team2.wins += 1
-                team1.losses += 1
-            else: # It's a tie
-                team1.ties += 1
-                team2.ties += 1
-                
-            # Update run differentials
-            team1.run_differential = team1.runs_scored - team1.runs_allowed
-            team2.run_differential = team2.runs_scored - team2.runs_allowed
-            
+        refresh_standings(game.tournament_id, list(deltas))
+        record_changes('game', [game.id])
+        game_data = game.to_dict()
+        queue_event('game', game_data)
+        _queue_standings_event()
         db.session.commit()
-        return jsonify(game.to_dict())
+        return jsonify(game_data)
+    except StaleDataError:
+        return _game_conflict(game_id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/schedule/scores', methods=['PUT'])
+def update_game_scores():
+    """Update the scores for a batch of games in one transaction"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('scores')
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'Expected a non-empty list of scores'}), 400
+    
+    # Validate the whole batch before loading anything
+    results = []
+    errors = []
+    for index, item in enumerate(data, start=1):
+        try:
+            if not isinstance(item, dict) or not all(field in item for field in ['id', 'team1_score', 'team2_score']):
+                raise ValueError('Missing required fields: id, team1_score, team2_score')
+            try:
+                result = {
+                    'id': int(item['id']),
+                    'team1_score': int(item['team1_score']),
+                    'team2_score': int(item['team2_score']),
+                    'status': item.get('status', 'Completed')
+                }
+            except (TypeError, ValueError):
+                raise ValueError('Game IDs and scores must be integers')
+            if result['team1_score'] < 0 or result['team2_score'] < 0:
+                raise ValueError('Scores cannot be negative')
+            if 'version' in item:
+                result['version'] = item['version']
+            results.append(result)
+        except ValueError as e:
+            errors.append({'row': index, 'error': str(e)})
+    if errors:
+        return jsonify({'error': f'{len(errors)} of {len(data)} scores are invalid; nothing was updated', 'results': errors}), 400
+    
+    try:
+        tournament_id = current_tournament_id()
+        game_ids = {result['id'] for result in results}
+        games = {
+            game.id: game
+            for game in Game.query
+                .options(joinedload(Game.team1), joinedload(Game.team2))
+                .filter(Game.tournament_id == tournament_id, Game.id.in_(game_ids))
+                .all()
+        }
+        missing = sorted(game_ids - set(games))
+        if missing:
+            return jsonify({'error': f'Games not found: {", ".join(map(str, missing))}'}), 404
+        
+        conflicts = sorted({result['id'] for result in results
+                            if 'version' in result and result['version'] != games[result['id']].version})
+        if conflicts:
+            return jsonify({'error': f'Games changed by someone else: {", ".join(map(str, conflicts))}; nothing was updated',
+                            'games': [games[game_id].to_dict() for game_id in conflicts]}), 409
+        
+        # Fold every pool result into per-team deltas; a game listed twice is re-scored in order
+        deltas = new_team_deltas()
+        for result in results:
+            game = games[result['id']]
+            old_result = (game.team1_score, game.team2_score, game.status)
+            game.team1_score = result['team1_score']
+            game.team2_score = result['team2_score']
+            game.status = result['status']
+            if game.is_pool_play:
+                fold_score_change(deltas, game.team1_id, game.team2_id, old_result,
+                                  (game.team1_score, game.team2_score, game.status))
+        
+        db.session.flush()
+        apply_team_deltas(deltas)
+        refresh_standings(tournament_id, list(deltas))
+        
+        # Serialize before committing so the games are not reloaded one by one
+        updated_ids = dict.fromkeys(result['id'] for result in results)
+        record_changes('game', updated_ids)
+        updated_games = [games[game_id].to_dict() for game_id in updated_ids]
+        for game_data in updated_games:
+            queue_event('game', game_data)
+        _queue_standings_event()
+        db.session.commit()
+        return jsonify(updated_games)
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'Games were changed by someone else; reload them and try again'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -786,15 +785,15 @@ def update_game_score(game_id):
 # --- Tournament Settings Endpoints ---
 
 @app.route('/api/settings', methods=['GET'])
+@read_only
+@conditional
 def get_settings():
     """Get tournament settings"""
     try:
-        # Get the first settings object or create one if it doesn't exist
-        settings = TournamentSettings.query.first()
+        # The default tournament is created at startup; other tournaments through POST /api/tournaments
+        settings = db.session.get(TournamentSettings, current_tournament_id())
         if not settings:
-            settings = TournamentSettings(name="Baseball Tournament")
-            db.session.add(settings)
-            db.session.commit()
+            return jsonify({"error": f"Tournament {current_tournament_id()} not found"}), 404
         
         return jsonify(settings.to_dict())
     except Exception as e:
@@ -806,11 +805,8 @@ def update_settings():
     try:
         data = request.get_json()
         
-        # Get the first settings object or create one if it doesn't exist
-        settings = TournamentSettings.query.first()
-        if not settings:
-            settings = TournamentSettings()
-            db.session.add(settings)
+        # resolve_tournament has already checked that the tournament exists
+        settings = db.session.get(TournamentSettings, current_tournament_id())
         
         # Update fields if they exist in the request
         if 'name' in data:
@@ -823,6 +819,13 @@ def update_settings():
         if 'adminPassword' in data:
             settings.admin_password = data['adminPassword']
         
+        # A new tiebreaker chain re-ranks the standings in the same transaction
+        if 'tiebreakers' in data:
+            chain = data['tiebreakers']
+            settings.tiebreakers = ','.join(parse_tiebreakers(chain)) if chain else None
+            rerank_standings(settings.id)
+            _queue_standings_event()
+        
         db.session.commit()
         return jsonify(settings.to_dict())
     except Exception as e:
@@ -831,30 +834,145 @@ def update_settings():
 
 @app.route('/api/reset', methods=['POST'])
 def reset_tournament():
-    """Reset the entire tournament, clearing all teams, games, brackets, and schedules"""
+    """Queue a reset of the current tournament, clearing its teams, games, brackets, and schedules"""
+    return _submit_job('reset_tournament', reset_tournament_task)
+
+# --- Tournaments ---
+
+@app.route('/api/tournaments', methods=['GET'])
+@read_only
+@conditional
+def get_tournaments():
+    """List every tournament served by this backend"""
     try:
-        # Delete all data in the correct order to avoid foreign key constraints
-        # First, delete all games (both regular and bracket)
-        Game.query.delete()
-        
-        # Delete all bracket matches
-        BracketMatch.query.delete()
-        
-        # Delete all teams
-        Team.query.delete()
-        
-        # Reset tournament settings to default (but keep the record)
-        settings = TournamentSettings.query.first()
-        if settings:
-            settings.name = "Baseball Tournament"
-            settings.description = ""
-            # Keep the admin password as is
-        
+        tournaments = TournamentSettings.query.order_by(TournamentSettings.id).all()
+        return jsonify([tournament.to_summary() for tournament in tournaments])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/tournaments', methods=['POST'])
+def create_tournament():
+    """Create a tournament; send its id as X-Tournament-ID to work with it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip():
+            return jsonify({"error": "Tournament name is required"}), 400
+        
+        tournament = TournamentSettings(
+            name=name.strip(),
+            description=data.get('description'),
+            admin_password=data.get('adminPassword')
+        )
+        db.session.add(tournament)
         db.session.commit()
-        return jsonify({"message": "Tournament successfully reset to initial state"})
+        return jsonify(tournament.to_summary()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+# --- Home Page Snapshot ---
+
+@app.route('/api/home', methods=['GET'])
+@read_only
+@conditional
+def get_home():
+    """Settings, schedule, rankings and bracket in one document from one read transaction"""
+    try:
+        settings = db.session.get(TournamentSettings, current_tournament_id())
+        if not settings:
+            return jsonify({"error": f"Tournament {current_tournament_id()} not found"}), 404
+        home_data = {
+            'settings': settings.to_dict(),
+            'schedule': _schedule(),
+            'rankings': _rankings(),
+            'bracket': {'rounds': _bracket_rounds()},
+            # Read in the same snapshot, so /api/changes?since= continues exactly from here
+            'changes_seq': latest_seq(current_tournament_id())
+        }
+        db.session.rollback()
+        return json_response(home_data)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# --- Background Jobs ---
+
+def _submit_job(kind, task, **params):
+    """Queue a job for the current tournament and answer 202 with its record and status URL"""
+    try:
+        job = submit_job(kind, task, **params)
+    except JobConflict as e:
+        return jsonify({"error": str(e), "job": e.job.to_dict(include_result=False)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+@app.route('/api/jobs', methods=['GET'])
+@read_only
+def get_jobs():
+    """The current tournament's most recent jobs, newest first, without their results"""
+    try:
+        jobs = (Job.query
+                .filter_by(tournament_id=current_tournament_id())
+                .order_by(Job.id.desc())
+                .limit(20)
+                .all())
+        return jsonify([job.to_dict(include_result=False) for job in jobs])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+@read_only
+def get_job(job_id):
+    """Status, progress and, once it succeeded, the result of a job"""
+    job = Job.query.filter_by(id=job_id, tournament_id=current_tournament_id()).first_or_404()
+    return jsonify(job.to_dict())
+
+# --- Change Log ---
+
+@app.route('/api/changes', methods=['GET'])
+@read_only
+@conditional
+def get_changes():
+    """Teams, games and bracket matches changed since a change-log seq (see changes_payload)"""
+    try:
+        since = int(request.args['since']) if request.args.get('since') else None
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    
+    try:
+        return json_response(changes_payload(current_tournament_id(), since, limit))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# --- Monitoring ---
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, connection-pool and SQLite lock metrics in Prometheus text format, summed over all workers"""
+    return Response(render_metrics(collect_metrics()), content_type=METRICS_CONTENT_TYPE)
+
+# --- Live Update Stream ---
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of committed changes to the current tournament (see event_stream_response).
+    
+    In production the event stream server (events_app.py) answers this URL;
+    this route serves the debug server and clients that reach the API directly.
+    """
+    return event_stream_response(current_tournament_id(), request.headers.get('Last-Event-ID', type=int))
+
 if __name__ == '__main__':
+    # Simulator pool processes would import this script again and set up a
+    # second app against the same database, so the debug server simulates in-process
+    simulation.SIMULATION_PROCESSES = 0
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Endpoint micro-benchmarks at several data scales.
+
+For every scale, a fresh temporary SQLite database is created through
+create_app (DATABASE_URL points at it), seeded with teams, games (most of
+them completed) and a generated bracket, and then every route in app.py is
+called through the Flask test client. Each route records its latency
+(median, min, max over the repeats) and the number of SQL statements one
+call executes on any engine. Routes registered on the app but not covered
+here are listed under "uncovered" so new routes do not go unmeasured.
+
+Each scale runs in its own interpreter because app.py builds the app (and
+its engines) when it is imported.
+
+Usage: python benchmarks.py [--scales 16,256,4096] [--repeat 5]
+                            [--output benchmarks.json] [--baseline old.json]
+
+With --baseline, exits non-zero if any route returns a different status,
+runs more SQL statements than in the baseline, or its fastest call got
+slower by more than --tolerance (default 1.5x, ignoring differences under
+2 milliseconds). The fastest call is compared because it is the least
+affected by noise from the rest of the machine.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as time_of_day, timedelta
+
+# Teams -> games seeded at each scale
+SCALES = {16: 240, 256: 10_000, 4096: 100_000}
+
+# Share of seeded games that are already Completed
+COMPLETED_SHARE = 0.7
+
+# Routes that cannot be timed as a single request/response
+SKIPPED_ROUTES = {
+    'GET /api/events': 'streams until the client disconnects',
+    'POST /games/': 'same view as POST /games',
+}
+
+def seed(teams, games, rng):
+    """Insert the teams and games directly, then derive counters and standings the way the app does"""
+    from sqlalchemy import insert
+    from database import db
+    from models import Team, Game
+    from standings import rebuild_team_stats
+
+    db.session.execute(insert(Team), [{'tournament_id': 1, 'name': f'Team {index + 1}'} for index in range(teams)])
+    team_ids = db.session.execute(db.select(Team.id).order_by(Team.id)).scalars().all()
+
+    start = date(2025, 6, 1)
+    rows = []
+    for index in range(games):
+        team1_id, team2_id = rng.sample(team_ids, 2)
+        completed = rng.random() < COMPLETED_SHARE
+        rows.append({
+            'tournament_id': 1,
+            'team1_id': team1_id,
+            'team2_id': team2_id,
+            'team1_score': rng.randint(0, 12) if completed else None,
+            'team2_score': rng.randint(0, 12) if completed else None,
+            'date': start + timedelta(days=index % 30),
+            'time': time_of_day(8 + index % 12),
+            'field': f'Field {index % 8 + 1}',
+            'status': 'Completed' if completed else 'Scheduled',
+            'game_type': 'Pool Play'
+        })
+    db.session.execute(insert(Game), rows)
+    rebuild_team_stats(1)
+    db.session.commit()
+
+def bracket_field_size(teams):
+    """Largest power of two up to 64 that the seeded teams can fill"""
+    return min(64, 1 << (teams.bit_length() - 1))
+
+def route_cases(client, teams):
+    """(route, method, url, body) for every request to time, in the order they run.
+
+    url and body are callables taking the repeat index, so write routes can
+    touch a different row on every call. Destructive routes come last.
+    """
+    team_ids = [team['id'] for team in client.get('/api/teams').get_json()]
+    # Bracket games are deleted when the bracket is regenerated, so only use pool games
+    games = [game for game in client.get('/api/schedule').get_json() if game['game_type'] == 'Pool Play']
+    completed = [game['id'] for game in games if game['status'] == 'Completed']
+    scheduled = [game['id'] for game in games if game['status'] == 'Scheduled']
+    pairs = [(team_ids[index], team_ids[-index - 1]) for index in range(len(team_ids) // 2)]
+    field_size = bracket_field_size(teams)
+    created_teams = []
+
+    def new_game(index):
+        team1_id, team2_id = pairs[index % len(pairs)]
+        return {'team1_id': team1_id, 'team2_id': team2_id, 'date': '2025-07-01',
+                'time': '10:00', 'field': 'Benchmark Field'}
+
+    def ready_match(index):
+        # A round-1 match that both teams reached and nobody has scored yet
+        rounds = client.get('/brackets').get_json()['rounds']
+        match = next(match for round_matches in rounds.values() for match in round_matches
+                     if match['status'] == 'Scheduled')
+        return f"/brackets/match/{match['matchId']}"
+
+    def created_team(index):
+        if not created_teams:
+            created_teams.extend(team['id'] for team in client.get('/api/teams').get_json()
+                                 if team['name'].startswith('Benchmark'))
+        return f'/api/teams/{created_teams.pop()}'
+
+    return [
+        ('GET /', 'GET', lambda i: '/', None),
+        ('GET /api/teams', 'GET', lambda i: '/api/teams', None),
+        ('GET /teams', 'GET', lambda i: '/teams', None),
+        ('GET /rankings', 'GET', lambda i: '/rankings', None),
+        ('GET /api/standings/seeding-odds', 'GET', lambda i: '/api/standings/seeding-odds?simulations=1000', None),
+        ('GET /brackets', 'GET', lambda i: '/brackets', None),
+        ('GET /api/schedule', 'GET', lambda i: '/api/schedule', None),
+        ('GET /api/schedule?status=Scheduled&limit=100', 'GET',
+         lambda i: '/api/schedule?status=Scheduled&limit=100', None),
+        ('GET /api/schedule/<int:game_id>', 'GET', lambda i: f'/api/schedule/{completed[i]}', None),
+        ('GET /api/changes', 'GET', lambda i: '/api/changes?since=0', None),
+        ('GET /api/settings', 'GET', lambda i: '/api/settings', None),
+        ('GET /api/home', 'GET', lambda i: '/api/home', None),
+        ('GET /api/tournaments', 'GET', lambda i: '/api/tournaments', None),
+        ('GET /metrics', 'GET', lambda i: '/metrics', None),
+        ('GET /api/jobs', 'GET', lambda i: '/api/jobs', None),
+        # The bracket generated while seeding is the first job
+        ('GET /api/jobs/<int:job_id>', 'GET', lambda i: '/api/jobs/1', None),
+        ('POST /api/teams', 'POST', lambda i: '/api/teams', lambda i: {'name': f'Benchmark {i}'}),
+        ('POST /teams', 'POST', lambda i: '/teams', lambda i: {'name': f'Benchmark alt {i}'}),
+        ('POST /api/teams/bulk', 'POST', lambda i: '/api/teams/bulk',
+         lambda i: [{'name': f'Benchmark bulk {i}.{n}'} for n in range(10)]),
+        ('POST /api/schedule', 'POST', lambda i: '/api/schedule', new_game),
+        ('POST /api/schedule/bulk', 'POST', lambda i: '/api/schedule/bulk',
+         lambda i: [new_game(i * 10 + n) for n in range(10)]),
+        ('PUT /api/schedule/<int:game_id>', 'PUT', lambda i: f'/api/schedule/{scheduled[i]}',
+         lambda i: {'field': f'Field {i % 8 + 1}'}),
+        ('PUT /api/schedule/<int:game_id>/score', 'PUT', lambda i: f'/api/schedule/{completed[0]}/score',
+         lambda i: {'team1_score': i % 7, 'team2_score': 3, 'status': 'Completed'}),
+        ('PUT /api/schedule/scores', 'PUT', lambda i: '/api/schedule/scores',
+         lambda i: [{'id': game_id, 'team1_score': i % 7, 'team2_score': 3, 'status': 'Completed'}
+                    for game_id in completed[1:11]]),
+        ('POST /games', 'POST', lambda i: '/games',
+         lambda i: {'team1_id': pairs[i % len(pairs)][0], 'team2_id': pairs[i % len(pairs)][1],
+                   'team1_score': 4, 'team2_score': 2}),
+        ('POST /api/standings/rebuild', 'POST', lambda i: '/api/standings/rebuild', lambda i: {'dry_run': True}),
+        ('PUT /api/settings', 'PUT', lambda i: '/api/settings', lambda i: {'description': f'Benchmark run {i}'}),
+        ('POST /api/tournaments', 'POST', lambda i: '/api/tournaments', lambda i: {'name': f'Benchmark {i}'}),
+        ('POST /brackets/generate', 'POST', lambda i: '/brackets/generate', lambda i: {'teams': field_size}),
+        ('PATCH /brackets/match/<int:match_id>', 'PATCH', ready_match,
+         lambda i: {'team1_score': 5, 'team2_score': 2}),
+        ('POST /brackets/clear', 'POST', lambda i: '/brackets/clear', None),
+        ('DELETE /api/schedule/<int:game_id>', 'DELETE', lambda i: f'/api/schedule/{scheduled[-i - 1]}', None),
+        ('DELETE /api/teams/<int:team_id>', 'DELETE', created_team, None),
+        ('DELETE /teams/<int:team_id>', 'DELETE', created_team, None),
+        ('POST /api/reset', 'POST', lambda i: '/api/reset', None),
+    ]
+
+def registered_routes(app):
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            routes.add(f'{method} {rule.rule}')
+    return routes
+
+def run_scale(teams, games, repeat, rng_seed=0):
+    """Seed a fresh database at one scale and time every route; returns the scale's results"""
+    workdir = tempfile.mkdtemp(prefix='benchmarks-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    # Run background jobs and seeding simulations inside the request, so
+    # their routes are timed end to end
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['SIMULATION_PROCESSES'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from sqlalchemy import event
+    from app import app
+    from database import db
+
+    started = time.perf_counter()
+    with app.app_context():
+        seed(teams, games, random.Random(rng_seed))
+    client = app.test_client()
+    client.post('/brackets/generate', json={'teams': bracket_field_size(teams)})
+    seed_seconds = time.perf_counter() - started
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', count_statement)
+
+    results = []
+    for route, method, url, body in route_cases(client, teams):
+        # Destructive routes only make sense once
+        runs = 1 if route == 'POST /api/reset' else repeat
+        timings = []
+        for index in range(runs):
+            target = url(index)
+            payload = body(index) if body else None
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.open(target, method=method, json=payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        results.append({
+            'route': route,
+            'status': response.status_code,
+            'runs': runs,
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'statements': statements[0],
+            'bytes': len(response.get_data())
+        })
+
+    covered = {result['route'] for result in results}
+    return {
+        'teams': teams,
+        'games': games,
+        'seed_seconds': round(seed_seconds, 3),
+        'results': results,
+        'uncovered': sorted(registered_routes(app) - covered - set(SKIPPED_ROUTES))
+    }
+
+def compare(report, baseline, tolerance):
+    """Regressions of report against baseline, as printable lines"""
+    previous = {(scale['teams'], result['route']): result
+                for scale in baseline['scales'] for result in scale['results']}
+    regressions = []
+    for scale in report['scales']:
+        for result in scale['results']:
+            before = previous.get((scale['teams'], result['route']))
+            if before is None:
+                continue
+            label = f"{scale['teams']:>5} teams  {result['route']}"
+            if result['status'] != before['status']:
+                regressions.append(f"{label}: status {before['status']} -> {result['status']}")
+            if result['statements'] > before['statements']:
+                regressions.append(f"{label}: {before['statements']} -> {result['statements']} statements")
+            if (result['min_ms'] > before['min_ms'] * tolerance
+                    and result['min_ms'] - before['min_ms'] > 2):
+                regressions.append(f"{label}: {before['min_ms']} -> {result['min_ms']} ms fastest")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=','.join(map(str, SCALES)),
+                        help='comma-separated team counts, from: ' + ', '.join(map(str, SCALES)))
+    parser.add_argument('--repeat', type=int, default=5, help='timed calls per route')
+    parser.add_argument('--output', default='benchmarks.json', help='where to write the JSON report')
+    parser.add_argument('--baseline', help='earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed slowdown factor')
+    parser.add_argument('--run-scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scale:
+        # Child process: one scale, JSON on the last line of stdout
+        result = run_scale(args.run_scale, SCALES[args.run_scale], args.repeat)
+        print(json.dumps(result))
+        return 0
+
+    scales = []
+    for teams in (int(value) for value in args.scales.split(',')):
+        if teams not in SCALES:
+            parser.error(f'unknown scale {teams}; choose from {", ".join(map(str, SCALES))}')
+        print(f'Benchmarking {teams} teams, {SCALES[teams]} games...', file=sys.stderr)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-scale', str(teams), '--repeat', str(args.repeat)],
+            capture_output=True, text=True, env=dict(os.environ)
+        )
+        if child.returncode != 0:
+            print(child.stderr, file=sys.stderr)
+            return child.returncode
+        scales.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'repeat': args.repeat,
+        'skipped': SKIPPED_ROUTES,
+        'scales': scales
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+
+    for scale in scales:
+        print(f"\n{scale['teams']} teams, {scale['games']} games (seeded in {scale['seed_seconds']}s)")
+        for result in scale['results']:
+            print(f"  {result['route']:45} {result['status']:>4} {result['median_ms']:>10.2f} ms"
+                  f" {result['statements']:>5} sql {result['bytes']:>10} bytes")
+        if scale['uncovered']:
+            print(f"  not benchmarked: {', '.join(scale['uncovered'])}")
+    print(f'\nWrote {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regressions against {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+from datetime import time
+from sqlalchemy import case, delete, select, update
+from changes import record_changes
+from database import db
+from models import BracketMatch, Game
+
+# Which part of the bracket a match belongs to
+WINNERS = 'winners'
+LOSERS = 'losers'
+FINAL = 'final'
+SIDE_ORDER = {WINNERS: 0, LOSERS: 1, FINAL: 2}
+
+# Start times handed out in turn to the bracket games scheduled at generation
+BRACKET_GAME_TIMES = [time(12), time(14), time(16), time(18)]
+
+def bracket_game_time(index):
+    return BRACKET_GAME_TIMES[index % len(BRACKET_GAME_TIMES)]
+
+def bracket_size(team_count):
+    """Smallest power of two that fits the field"""
+    return 1 << (team_count - 1).bit_length()
+
+def seed_positions(size):
+    """Seeds in bracket order for a power-of-two field, e.g. 8 -> [1, 8, 4, 5, 2, 7, 3, 6].
+
+    Adjacent seeds meet in round 1 and the top seeds can only meet late.
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+def _full_bracket(size, double_elimination):
+    """Every match of a full power-of-two bracket, in an order where sources come first.
+
+    Each match has two sources: ('seed', n), ('winner', index) or ('loser', index).
+    """
+    matches = []
+
+    def add(side, round_number, source1, source2):
+        matches.append((side, round_number, (source1, source2)))
+        return len(matches) - 1
+
+    positions = seed_positions(size)
+    current = [add(WINNERS, 1, ('seed', positions[i]), ('seed', positions[i + 1]))
+               for i in range(0, size, 2)]
+    winners_rounds = [current]
+    while len(current) > 1:
+        round_number = len(winners_rounds) + 1
+        current = [add(WINNERS, round_number, ('winner', current[i]), ('winner', current[i + 1]))
+                   for i in range(0, len(current), 2)]
+        winners_rounds.append(current)
+
+    if not double_elimination:
+        return matches
+
+    # Losers bracket: round-1 losers pair off, then every later winners round
+    # drops its losers in against the survivors (in reverse order, to put off
+    # rematches), with a consolidation round in between while more than one remains
+    first = winners_rounds[0]
+    losers_round = 1
+    current = [add(LOSERS, losers_round, ('loser', first[i]), ('loser', first[i + 1]))
+               for i in range(0, len(first), 2)]
+    for winners_round in winners_rounds[1:]:
+        losers_round += 1
+        dropping = winners_round[::-1]
+        current = [add(LOSERS, losers_round, ('winner', current[i]), ('loser', dropping[i]))
+                   for i in range(len(current))]
+        if len(current) > 1:
+            losers_round += 1
+            current = [add(LOSERS, losers_round, ('winner', current[i]), ('winner', current[i + 1]))
+                       for i in range(0, len(current), 2)]
+
+    add(FINAL, 1, ('winner', winners_rounds[-1][0]), ('winner', current[0]))
+    return matches
+
+def check_field(team_count, double_elimination=False):
+    """Raise ValueError if no bracket of this kind exists for team_count teams"""
+    if team_count < 2:
+        raise ValueError('A bracket needs at least 2 teams')
+    if double_elimination and team_count < 3:
+        raise ValueError('A double elimination bracket needs at least 3 teams')
+
+def build_bracket(team_count, double_elimination=False):
+    """Plan every match of a bracket for team_count seeded teams.
+
+    Fields that are not a power of two get byes: the top seeds skip round 1.
+    Matches that would involve a bye (including losers-bracket matches fed
+    by one) are collapsed, so the team that would pass through is wired
+    straight to its next real match. Double elimination ends with one grand
+    final between the winners- and losers-bracket champions.
+
+    Returns one dict per match, in match_display_id order, with the seeds
+    placed at generation time and the advancement table: where the winner
+    (and loser) of each match plays next and in which slot (1 or 2).
+    """
+    check_field(team_count, double_elimination)
+
+    full = _full_bracket(bracket_size(team_count), double_elimination)
+
+    # Resolve each match's sources; a match with an empty side is a bye and
+    # passes its other source through as its "winner"
+    winner_of = {}
+    loser_of = {}
+    played = {}
+    for index, (side, round_number, sources) in enumerate(full):
+        resolved = []
+        for kind, value in sources:
+            if kind == 'seed':
+                resolved.append((kind, value) if value <= team_count else None)
+            elif kind == 'winner':
+                resolved.append(winner_of[value])
+            else:
+                resolved.append(loser_of[value])
+        if all(resolved):
+            played[index] = resolved
+            winner_of[index] = ('winner', index)
+            loser_of[index] = ('loser', index)
+        else:
+            winner_of[index] = next((source for source in resolved if source), None)
+            loser_of[index] = None
+
+    # Number the played matches and their rounds consecutively: winners
+    # bracket, then losers bracket, then the grand final
+    ordered = sorted(played, key=lambda index: (SIDE_ORDER[full[index][0]], full[index][1], index))
+    round_numbers = {}
+    plan = {}
+    for display_id, index in enumerate(ordered, start=1):
+        side, round_number, _ = full[index]
+        round_numbers.setdefault((side, round_number), len(round_numbers) + 1)
+        plan[index] = {
+            'match_display_id': display_id,
+            'round_number': round_numbers[(side, round_number)],
+            'bracket_side': side,
+            'team1_seed': None,
+            'team2_seed': None,
+            'winner_next_match': None,
+            'winner_next_slot': None,
+            'loser_next_match': None,
+            'loser_next_slot': None
+        }
+
+    for index, sources in played.items():
+        for slot, (kind, value) in enumerate(sources, start=1):
+            if kind == 'seed':
+                plan[index][f'team{slot}_seed'] = value
+            else:
+                plan[value][f'{kind}_next_match'] = plan[index]['match_display_id']
+                plan[value][f'{kind}_next_slot'] = slot
+
+    return [plan[index] for index in ordered]
+
+def bye_seeds(team_count):
+    """Seeds that skip the first round of a team_count-team bracket"""
+    first_round = {
+        seed
+        for match in build_bracket(team_count)
+        if match['bracket_side'] == WINNERS and match['round_number'] == 1
+        for seed in (match['team1_seed'], match['team2_seed'])
+    }
+    return [seed for seed in range(1, team_count + 1) if seed not in first_round]
+
+def clear_bracket_rows(tournament_id):
+    """Delete a tournament's bracket matches and bracket games, logging each in the change log"""
+    record_changes('bracket_match', db.session.execute(
+        select(BracketMatch.match_display_id).where(BracketMatch.tournament_id == tournament_id)
+    ).scalars(), deleted=True, tournament_id=tournament_id)
+    record_changes('game', db.session.execute(
+        select(Game.id).where(Game.tournament_id == tournament_id, Game.game_type == 'Bracket')
+    ).scalars(), deleted=True, tournament_id=tournament_id)
+    db.session.execute(delete(BracketMatch).where(BracketMatch.tournament_id == tournament_id))
+    db.session.execute(delete(Game).where(Game.tournament_id == tournament_id, Game.game_type == 'Bracket'))
+
+def advance_team(tournament_id, match_display_id, slot, team_id, seed):
+    """Place a team in a slot of its next match with one UPDATE.
+
+    The match becomes Scheduled once both slots are filled. Returns the
+    match's (team1_id, team2_id, status) after the update.
+    """
+    if slot == 1:
+        values = {'team1_id': team_id, 'team1_seed': seed}
+        other_team = BracketMatch.team2_id
+    else:
+        values = {'team2_id': team_id, 'team2_seed': seed}
+        other_team = BracketMatch.team1_id
+    values['status'] = case((other_team.isnot(None), 'Scheduled'), else_=BracketMatch.status)
+
+    return db.session.execute(
+        update(BracketMatch)
+        .where(BracketMatch.tournament_id == tournament_id,
+               BracketMatch.match_display_id == match_display_id)
+        .values(**values)
+        .returning(BracketMatch.team1_id, BracketMatch.team2_id, BracketMatch.status),
+        execution_options={'synchronize_session': False}
+    ).one()
@@ -0,0 +1,185 @@
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from database import db
+from models import Game, Standing, BracketMatch, Change, ChangeHorizon
+from serializers import rankings_payload, schedule_payload, bracket_matches
+from tournaments import current_tournament_id
+
+# The kinds of rows the change log tracks
+ENTITIES = ('team', 'game', 'bracket_match')
+
+# Deletions remembered per tournament; older ones are dropped and move the horizon
+MAX_TOMBSTONES = 1000
+
+# Page size bounds for GET /api/changes?limit=
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+def record_changes(entity, entity_ids, deleted=False, tournament_id=None):
+    """Log rows written by the current transaction; they reach the change log only if it commits.
+
+    entity_ids are team or game ids, or match_display_ids for bracket matches.
+    Logging the same row twice keeps the last call, so a row created and then
+    deleted in one transaction is logged as deleted.
+    """
+    if tournament_id is None:
+        tournament_id = current_tournament_id()
+    pending = db.session.info.setdefault('pending_changes', {})
+    for entity_id in entity_ids:
+        if entity_id is not None:
+            pending[(tournament_id, entity, entity_id)] = deleted
+
+def reset_changes(tournament_id=None):
+    """Forget every change of a tournament, so its clients reload everything (after a reset)"""
+    if tournament_id is None:
+        tournament_id = current_tournament_id()
+    db.session.info['reset_changes'] = db.session.info.get('reset_changes', set()) | {tournament_id}
+
+def _move_horizon(connection, tournament_id, seq):
+    horizon = connection.execute(
+        select(ChangeHorizon.seq).where(ChangeHorizon.tournament_id == tournament_id)
+    ).scalar()
+    if horizon is None:
+        connection.execute(insert(ChangeHorizon).values(tournament_id=tournament_id, seq=seq))
+    elif seq > horizon:
+        connection.execute(
+            update(ChangeHorizon).where(ChangeHorizon.tournament_id == tournament_id).values(seq=seq)
+        )
+
+def _prune_tombstones(connection, tournament_id):
+    """Drop the oldest deletions beyond MAX_TOMBSTONES; clients older than them must resync"""
+    cutoff = connection.execute(
+        select(Change.seq)
+        .where(Change.tournament_id == tournament_id, Change.deleted.is_(True))
+        .order_by(Change.seq.desc())
+        .offset(MAX_TOMBSTONES)
+        .limit(1)
+    ).scalar()
+    if cutoff is None:
+        return
+    connection.execute(
+        delete(Change).where(Change.tournament_id == tournament_id, Change.deleted.is_(True), Change.seq <= cutoff)
+    )
+    _move_horizon(connection, tournament_id, cutoff)
+
+@event.listens_for(Session, 'before_commit')
+def _write_change_log(session):
+    reset_tournaments = session.info.pop('reset_changes', ())
+    pending = session.info.pop('pending_changes', None)
+    if not reset_tournaments and not pending:
+        return
+    # On the connection rather than the session, so the log's own writes are
+    # not taken for data changes (see data_version)
+    connection = session.connection()
+
+    for tournament_id in reset_tournaments:
+        connection.execute(delete(Change).where(Change.tournament_id == tournament_id))
+        # Use up a seq so the horizon is past every seq a client may hold
+        marker = connection.execute(insert(Change).values(
+            tournament_id=tournament_id, entity='reset', entity_id=0, deleted=True
+        )).inserted_primary_key[0]
+        connection.execute(delete(Change).where(Change.seq == marker))
+        _move_horizon(connection, tournament_id, marker)
+
+    if not pending:
+        return
+    # Compaction: a row's previous entry goes before its new one is appended
+    keys = {}
+    for tournament_id, entity, entity_id in pending:
+        keys.setdefault((tournament_id, entity), []).append(entity_id)
+    for (tournament_id, entity), entity_ids in keys.items():
+        connection.execute(delete(Change).where(
+            Change.tournament_id == tournament_id,
+            Change.entity == entity,
+            Change.entity_id.in_(entity_ids)
+        ))
+    connection.execute(insert(Change), [
+        {'tournament_id': tournament_id, 'entity': entity, 'entity_id': entity_id, 'deleted': deleted}
+        for (tournament_id, entity, entity_id), deleted in pending.items()
+    ])
+    for tournament_id in {tournament_id for (tournament_id, _, _), deleted in pending.items() if deleted}:
+        _prune_tombstones(connection, tournament_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_changes(session):
+    session.info.pop('pending_changes', None)
+    session.info.pop('reset_changes', None)
+
+def _horizon(tournament_id):
+    return db.session.execute(
+        select(ChangeHorizon.seq).where(ChangeHorizon.tournament_id == tournament_id)
+    ).scalar() or 0
+
+def _newest_seq(tournament_id):
+    return db.session.execute(
+        select(func.max(Change.seq)).where(Change.tournament_id == tournament_id)
+    ).scalar() or 0
+
+def latest_seq(tournament_id):
+    """The seq to sync from after loading everything in the same transaction"""
+    return max(_newest_seq(tournament_id), _horizon(tournament_id))
+
+def changes_payload(tournament_id, since=None, limit=DEFAULT_PAGE_SIZE):
+    """The current state of every row changed after seq `since`, oldest change first.
+
+    Returns {"seq", "more", "resync", "teams", "games", "bracket_matches",
+    "deleted"}. teams are rankings rows, games schedule rows and
+    bracket_matches bracket match dicts; deleted lists the ids removed per
+    entity. A row that changed several times appears once, as it is now.
+    Pass the returned seq as the next `since`; more means another page is
+    waiting. resync means changes after `since` were compacted away: the
+    client must reload everything and continue from seq. Without `since`
+    only the current seq is returned.
+    """
+    horizon = _horizon(tournament_id)
+    latest = max(_newest_seq(tournament_id), horizon)
+    # A seq from the future was handed out by another database (or before a restore)
+    if since is None or since < horizon or since > latest:
+        empty = {'teams': [], 'games': [], 'bracket_matches': [], 'deleted': {entity: [] for entity in ENTITIES}}
+        return dict(empty, seq=latest, more=False, resync=since is not None)
+
+    rows = db.session.execute(
+        select(Change.seq, Change.entity, Change.entity_id, Change.deleted)
+        .where(Change.tournament_id == tournament_id, Change.seq > since)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = {entity: [] for entity in ENTITIES}
+    deleted = {entity: [] for entity in ENTITIES}
+    for row in rows:
+        (deleted if row.deleted else changed)[row.entity].append(row.entity_id)
+
+    # Looked up by primary key in every tournament; ids of deleted rows can be reused elsewhere
+    teams = []
+    if changed['team']:
+        teams = [team for team in rankings_payload(None, [Standing.team_id.in_(changed['team'])])
+                 if team['tournament_id'] == tournament_id]
+    games = []
+    if changed['game']:
+        games = [game for game in schedule_payload(None, [Game.id.in_(changed['game'])])
+                 if game['tournament_id'] == tournament_id]
+    matches = []
+    if changed['bracket_match']:
+        matches = bracket_matches(tournament_id, [BracketMatch.match_display_id.in_(changed['bracket_match'])])
+
+    # Rows removed by a write that logged no deletion are reported as deleted too
+    found = {
+        'team': {team['id'] for team in teams},
+        'game': {game['id'] for game in games},
+        'bracket_match': {match['matchId'] for match in matches},
+    }
+    for entity in ENTITIES:
+        deleted[entity] += [entity_id for entity_id in changed[entity] if entity_id not in found[entity]]
+
+    return {
+        'seq': rows[-1].seq if rows else since,
+        'more': more,
+        'resync': False,
+        'teams': teams,
+        'games': games,
+        'bracket_matches': matches,
+        'deleted': deleted
+    }
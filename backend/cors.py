@@ -0,0 +1,22 @@
+from flask_cors import CORS
+from schedule_filters import NEXT_CURSOR_HEADER
+from tournaments import TOURNAMENT_HEADER
+
+# Sites the frontend is served from
+ALLOWED_ORIGINS = ["http://localhost:8080", "http://localhost",
+                   "http://localhost:80", "http://127.0.0.1:8080",
+                   "http://ec2-44-194-164-99.compute-1.amazonaws.com",
+                   "http://ec2-44-194-164-99.compute-1.amazonaws.com:80"]
+
+def init_cors(app):
+    """Configure CORS with explicit headers for every URL of the app (the API and the event stream server)"""
+    CORS(app,
+         resources={r"/*": {
+             "origins": ALLOWED_ORIGINS,
+             "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Requested-With", TOURNAMENT_HEADER],
+             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
+             "expose_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Origin",
+                                "Access-Control-Allow-Methods", "Access-Control-Allow-Headers",
+                                NEXT_CURSOR_HEADER]
+         }},
+         supports_credentials=False)
@@ -0,0 +1,71 @@
+import functools
+from flask import Response, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from database import db
+from models import DataVersion
+from tournaments import TOURNAMENT_HEADER, current_tournament_id
+
+# The one DataVersion row
+DATA_VERSION_ID = 1
+
+def ensure_data_version():
+    """Create the counter row if the database does not have it yet"""
+    if db.session.get(DataVersion, DATA_VERSION_ID) is None:
+        db.session.add(DataVersion(id=DATA_VERSION_ID, version=0))
+
+def current_data_version():
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.id == DATA_VERSION_ID)
+    ).scalar() or 0
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_bulk_write(orm_execute_state):
+    # Core-style INSERT/UPDATE/DELETE through session.execute bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['data_changed'] = True
+
+@event.listens_for(Session, 'after_flush')
+def _note_flushed_write(session, flush_context):
+    # new/dirty/deleted still list what this flush wrote
+    if session.new or session.dirty or session.deleted:
+        session.info['data_changed'] = True
+
+@event.listens_for(Session, 'before_commit')
+def _bump_data_version(session):
+    # Pending ORM changes are flushed after this hook, so check them as well
+    if session.info.pop('data_changed', False) or session.new or session.dirty or session.deleted:
+        session.execute(
+            update(DataVersion)
+            .where(DataVersion.id == DATA_VERSION_ID)
+            .values(version=DataVersion.version + 1),
+            execution_options={'synchronize_session': False}
+        )
+    session.info.pop('data_changed', None)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_data_change(session):
+    session.info.pop('data_changed', None)
+
+def conditional(view):
+    """Answer GETs with a weak ETag from the data version and tournament, and 304 when it matches.
+
+    The version is read before the view runs, in the same transaction as its
+    queries, so a matching If-None-Match skips the view's queries and
+    serialization entirely.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = f'{current_data_version()}-{current_tournament_id()}'
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        # Revalidate every time; responses differ per tournament header
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add(TOURNAMENT_HEADER)
+        return response
+    return wrapper
@@ -1,4 +1,130 @@
+import functools
+import os
+import threading
+import time
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Bind key of the pooled read-only engine used by read-only routes
+READ_BIND = 'read'
+
+# How long a connection waits for a SQLite lock before failing with "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 8))
+
+# A BEGIN that takes longer than this waited for another connection's lock
+LOCK_WAIT_THRESHOLD = 0.001
+
+class LockWaitStats:
+    """Per-bind count and total seconds of BEGINs that waited for SQLite's lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = {}
+
+    def record(self, bind_key, seconds):
+        with self._lock:
+            count, total = self._waits.get(bind_key, (0, 0.0))
+            self._waits[bind_key] = (count + 1, total + seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._waits)
+
+lock_waits = LockWaitStats()
+
+class RoutingSession(Session):
+    """Session that sends queries from read-only routes to the read-only engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and READ_BIND in self._db.engines
+                and has_app_context() and g.get('db_read_only')):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
 # Initialize SQLAlchemy object
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def configure_database(app):
+    """Set the database URI and the engine options for SQLite concurrency.
+
+    For a SQLite file the default engine is the single writer: a pool of one
+    connection, so concurrent writes queue for it instead of fighting over
+    SQLite's lock. A second bind opens the same file read-only
+    (mode=ro) with a larger pool for the read-only routes.
+    """
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///tournament.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 1,
+        'max_overflow': 0,
+        'pool_timeout': 30
+    }
+    read_url = url.set(database=f'file:{url.database}').update_query_dict({'mode': 'ro', 'uri': 'true'})
+    app.config['SQLALCHEMY_BINDS'] = {
+        READ_BIND: {
+            'url': read_url.render_as_string(hide_password=False),
+            'pool_size': READ_POOL_SIZE,
+            'max_overflow': READ_POOL_SIZE
+        }
+    }
+
+def _configure_sqlite_engine(engine, bind_key, begin_statement, writer):
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy's begin event start transactions instead of the driver,
+        # which would otherwise only BEGIN before the first INSERT/UPDATE/DELETE
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        if writer:
+            # WAL lets readers keep reading while a write is in progress
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(connection):
+        # busy_timeout makes SQLite wait inside BEGIN when another connection holds the lock
+        started = time.perf_counter()
+        connection.exec_driver_sql(begin_statement)
+        waited = time.perf_counter() - started
+        if waited >= LOCK_WAIT_THRESHOLD:
+            lock_waits.record(bind_key or 'default', waited)
+
+def init_engines(app):
+    """Install the SQLite pragmas and transaction handling on the app's engines.
+
+    Writer transactions take the write lock up front (BEGIN IMMEDIATE), so a
+    read-modify-write never has to upgrade its lock halfway through. Every
+    read-only transaction is a plain BEGIN, which pins its reads to one
+    consistent snapshot.
+    """
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            if bind_key == READ_BIND:
+                _configure_sqlite_engine(engine, bind_key, 'BEGIN', writer=False)
+            else:
+                _configure_sqlite_engine(engine, bind_key, 'BEGIN IMMEDIATE', writer=True)
+
+def use_read_engine():
+    """Route the rest of this request's new transactions to the read-only engine"""
+    g.db_read_only = True
+
+def read_only(view):
+    """Mark a route as read-only so its queries use the pooled read-only engine"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        use_read_engine()
+        return view(*args, **kwargs)
+    return wrapper
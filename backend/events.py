@@ -0,0 +1,249 @@
+import os
+import threading
+from collections import deque
+from flask import Response, current_app, jsonify
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from database import db, READ_BIND
+from models import LiveEvent
+from tournaments import current_tournament_id
+
+# Events kept in the event log and in each process's buffer; a client that
+# reconnects further behind than this gets a resync
+EVENT_HISTORY = 1000
+
+# Seconds between a process's reads of the event log. Commits made by the
+# process itself are read at once; this bounds the delay for other workers'.
+EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 0.5))
+
+# Open /api/events streams per process. 0 means no limit; the Gunicorn
+# configs set one from their thread count (a stream holds a request thread)
+# or connection count (on the event stream server it is a greenlet).
+EVENT_STREAM_LIMIT = int(os.environ.get('EVENT_STREAM_LIMIT', 0))
+
+class EventBroker:
+    """In-process fan-out of change events to Server-Sent Events subscribers.
+
+    Events live in one bounded ring buffer and every event is encoded once when
+    it is published. A subscriber is only a cursor (the last event id it has
+    seen) waiting on a shared condition, so idle subscribers cost a parked
+    thread (a greenlet on the event stream server) and nothing per event
+    beyond a wake-up.
+    """
+
+    def __init__(self, history=EVENT_HISTORY):
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=history)
+        self._last_id = 0
+        self.subscribers = 0
+        self.closed = False
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, event_id, event_type, payload, tournament_id):
+        """Append an event read from the event log (ids only grow) and wake every subscriber"""
+        with self._condition:
+            self._last_id = event_id
+            self._events.append((event_id, event_type, payload, tournament_id))
+            self._condition.notify_all()
+
+    def subscribe(self, limit):
+        """Count a new stream; False if limit streams (0: no limit) are already open"""
+        with self._condition:
+            if limit and self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def close(self):
+        """Wake every subscriber and tell it to end its stream"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def is_available(self, last_id):
+        """True if every event after last_id is still in the buffer"""
+        with self._condition:
+            if last_id == self._last_id:
+                return True
+            if last_id > self._last_id:
+                # The event log never handed out this id (the database was replaced)
+                return False
+            return bool(self._events) and self._events[0][0] <= last_id + 1
+
+    def wait_for_events(self, last_id, timeout):
+        """Return the events published after last_id, waiting up to timeout seconds for one"""
+        with self._condition:
+            if self._last_id <= last_id and not self.closed:
+                self._condition.wait(timeout)
+            if self._last_id <= last_id:
+                return []
+            # Newest events sit at the right; walk back only as far as needed
+            pending = []
+            for buffered in reversed(self._events):
+                if buffered[0] <= last_id:
+                    break
+                pending.append(buffered)
+            pending.reverse()
+            return pending
+
+broker = EventBroker()
+
+class EventLogFollower:
+    """Feeds the broker from the event log, so streams on every worker see
+    every worker's commits.
+
+    Started by the first stream a process serves: it loads the newest
+    EVENT_HISTORY events, then a thread reads the ones after them every
+    EVENT_POLL_INTERVAL seconds, or as soon as the process commits one itself.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._app = None
+        self._engine = None
+        self._pid = None
+
+    def start(self):
+        """Start following in this process (inside an app context); idempotent"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._app = current_app._get_current_object()
+            # Reads go through the read-only pool when there is one
+            self._engine = db.engines.get(READ_BIND, db.engine)
+            with self._engine.connect() as connection:
+                newest = connection.execute(select(func.max(LiveEvent.id))).scalar() or 0
+            self._read_after(newest - EVENT_HISTORY)
+            self._pid = os.getpid()
+            threading.Thread(target=self._follow, name='event-log', daemon=True).start()
+
+    def wake(self):
+        self._wake.set()
+
+    def poll(self):
+        """Publish the events committed since the last read, if following"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._read_after(self.broker.last_id)
+
+    def _read_after(self, last_id):
+        with self._engine.connect() as connection:
+            rows = connection.execute(
+                select(LiveEvent.id, LiveEvent.event_type, LiveEvent.payload, LiveEvent.tournament_id)
+                .where(LiveEvent.id > last_id)
+                .order_by(LiveEvent.id)
+            ).all()
+        for row in rows:
+            self.broker.publish(*row)
+
+    def _follow(self):
+        while not self.broker.closed:
+            self._wake.wait(EVENT_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception:
+                self._app.logger.exception('Reading the event log failed')
+
+follower = EventLogFollower(broker)
+
+def queue_event(event_type, data):
+    """Queue a change event for the current tournament on the current transaction.
+
+    The payload is encoded now, while the ORM objects it was built from are
+    still loaded, and goes into the event log only if the transaction commits.
+    """
+    db.session.info.setdefault('pending_events', []).append(
+        (event_type, current_app.json.dumps(data), current_tournament_id())
+    )
+
+@event.listens_for(Session, 'before_commit')
+def _write_pending_events(session):
+    pending = session.info.pop('pending_events', None)
+    if not pending:
+        return
+    # On the connection rather than the session, so these writes are not
+    # taken for data changes (see data_version)
+    connection = session.connection()
+    connection.execute(insert(LiveEvent), [
+        {'event_type': event_type, 'payload': payload, 'tournament_id': tournament_id}
+        for event_type, payload, tournament_id in pending
+    ])
+    connection.execute(delete(LiveEvent).where(
+        LiveEvent.id <= select(func.max(LiveEvent.id) - EVENT_HISTORY).scalar_subquery()
+    ))
+    session.info['events_written'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _wake_follower(session):
+    if session.info.pop('events_written', False):
+        follower.wake()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_events(session):
+    session.info.pop('pending_events', None)
+    session.info.pop('events_written', None)
+
+def format_event(event_id, event_type, payload):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+def event_stream_response(tournament_id, last_event_id=None):
+    """Server-Sent Events stream of committed changes to a tournament.
+
+    Event types: game, game_deleted, schedule, team, team_deleted, teams,
+    standings, bracket, reset and resync. Events come from the event log, so
+    a stream sees commits made by every worker. A reconnecting client sends
+    Last-Event-ID and receives what it missed; if that is no longer buffered
+    it gets a resync event and should reload its data. Past
+    EVENT_STREAM_LIMIT open streams the process answers 503.
+    """
+    if not broker.subscribe(EVENT_STREAM_LIMIT):
+        response = jsonify({"error": "Too many live update streams are open; reload to see changes"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    try:
+        follower.start()
+        if last_event_id is not None and last_event_id > broker.last_id:
+            # The client saw an event on another worker that this one has not read yet
+            follower.poll()
+    except Exception as e:
+        broker.unsubscribe()
+        return jsonify({"error": str(e)}), 500
+
+    def stream(last_id):
+        yield 'retry: 3000\n\n'
+        if last_id is None:
+            last_id = broker.last_id
+        elif not broker.is_available(last_id):
+            last_id = broker.last_id
+            yield format_event(last_id, 'resync', '{}')
+
+        while not broker.closed:
+            events = broker.wait_for_events(last_id, timeout=15)
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            for event_id, event_type, payload, event_tournament_id in events:
+                # One broker serves every tournament; skip other tournaments' events
+                if event_tournament_id == tournament_id:
+                    yield format_event(event_id, event_type, payload)
+                last_id = event_id
+
+    response = Response(stream(last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server is done with the response, even if the stream never started
+    response.call_on_close(broker.unsubscribe)
+    return response
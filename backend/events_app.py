@@ -0,0 +1,35 @@
+"""Event stream server: a WSGI app that serves only GET /api/events.
+
+gunicorn_events.conf.py runs it on gevent workers, where an open stream is
+a parked greenlet instead of one of the API workers' request threads, so a
+worker holds thousands of idle subscribers. It reads the same database as
+the API (the event log) and leaves the schema, jobs and standings to the
+API server.
+
+    gunicorn -c gunicorn_events.conf.py events_app:app
+"""
+from flask import Flask, jsonify, request
+from cors import init_cors
+from database import db, configure_database, init_engines
+from events import event_stream_response
+from tournaments import tournament_id_from_request
+
+def create_events_app():
+    app = Flask(__name__)
+    init_cors(app)
+    configure_database(app)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    init_engines(app)
+    return app
+
+app = create_events_app()
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of committed changes to a tournament (see event_stream_response)"""
+    try:
+        tournament_id = tournament_id_from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return event_stream_response(tournament_id, request.headers.get('Last-Event-ID', type=int))
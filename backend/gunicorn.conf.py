@@ -0,0 +1,102 @@
+"""Gunicorn settings for serving the backend in production.
+
+Run from the backend directory:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting below can be tuned through the environment variable next to it.
+"""
+import os
+import shutil
+import signal
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+
+# Pre-forked worker processes, each running a pool of request threads.
+# Live event streams belong on the event stream server
+# (gunicorn_events.conf.py); one opened here holds a thread for as long as
+# it is open, so a worker keeps 8 threads (at least half) for other
+# requests and answers further streams with 503; set before the app is imported.
+workers = int(os.environ.get('GUNICORN_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+os.environ.setdefault('EVENT_STREAM_LIMIT', str(max(threads - 8, threads // 2)))
+
+# Keep idle client connections open briefly so browsers and proxies reuse them
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+
+# Restart a worker that stops responding, and give in-flight requests time to finish on shutdown
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 20))
+
+# Recycle workers periodically to cap memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# Import the app (and run its schema setup) once in the master before forking
+preload_app = True
+
+# Workers write their request metrics here so /metrics can add them up;
+# set in the environment before the app is imported. A directory made here
+# is removed again on shutdown.
+metrics_dir_created = 'METRICS_DIR' not in os.environ
+if metrics_dir_created:
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='tournament-metrics-')
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+def on_starting(server):
+    """Start every run's metrics from zero"""
+    directory = os.environ['METRICS_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+def on_exit(server):
+    if metrics_dir_created:
+        shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+def child_exit(server, worker):
+    """Keep an exited worker's request counts in the /metrics totals and fail the jobs it was running"""
+    from app import app
+    from database import db
+    from jobs import fail_interrupted_jobs
+    from metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+    with app.app_context():
+        fail_interrupted_jobs(worker.pid)
+        db.session.commit()
+
+def post_fork(server, worker):
+    """Give each worker its own database connections.
+
+    The master opened connections while creating tables; SQLite connections
+    must not be shared across processes, so drop the inherited pool without
+    closing the parent's handles.
+    """
+    from app import app
+    from database import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def post_worker_init(worker):
+    """End open event streams when the worker is asked to shut down.
+
+    Streams never finish on their own, so without this a graceful shutdown
+    always waits out graceful_timeout.
+    """
+    from events import broker
+
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def close_streams_and_exit(signum, frame):
+        broker.close()
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, close_streams_and_exit)
@@ -0,0 +1,50 @@
+"""Gunicorn settings for the event stream server (GET /api/events).
+
+Run from the backend directory next to the API server:
+
+    gunicorn -c gunicorn_events.conf.py events_app:app
+
+gevent workers park each open stream as a greenlet, so idle subscribers
+hold no request threads; the API server's gthread workers stay free for
+ordinary requests. Every setting below can be tuned through the
+environment variable next to it.
+"""
+import os
+import signal
+
+bind = os.environ.get('EVENTS_BIND', '0.0.0.0:5002')
+
+# One worker follows the event log once for all of its streams; a few
+# thousand streams per worker need no more
+workers = int(os.environ.get('EVENTS_WORKERS', 1))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('EVENTS_WORKER_CONNECTIONS', 2000))
+# Streams past the limit get a 503 rather than waiting for a free connection;
+# set before the app is imported
+os.environ.setdefault('EVENT_STREAM_LIMIT', str(max(worker_connections - 64, worker_connections // 2)))
+
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# Open streams are ended on shutdown (see post_worker_init) and reconnect with Last-Event-ID
+graceful_timeout = int(os.environ.get('EVENTS_GRACEFUL_TIMEOUT', 5))
+
+# gevent patches the standard library when a worker starts, before the app
+# is imported; an app imported in the master would keep unpatched locks and threads
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+def post_worker_init(worker):
+    """End open event streams when the worker is asked to shut down"""
+    from events import broker
+
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def close_streams_and_exit(signum, frame):
+        broker.close()
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, close_streams_and_exit)
@@ -0,0 +1,145 @@
+import csv
+import io
+from datetime import datetime
+from flask import request
+from database import db
+from models import Team
+
+# Columns accepted by the bulk team import, matching the fields add_team reads
+TEAM_STAT_FIELDS = ['wins', 'losses', 'runs_scored', 'runs_allowed', 'run_differential', 'games_played']
+
+# Columns the bulk schedule import requires, matching create_game
+GAME_REQUIRED_FIELDS = ['team1_id', 'team2_id', 'date', 'time', 'field']
+
+class UploadError(ValueError):
+    """Raised when the upload itself cannot be read (as opposed to a bad row)"""
+
+def read_import_rows(key):
+    """Read the rows of a bulk upload from the current request.
+
+    Accepts a JSON array (or an object holding the array under `key`), a CSV
+    file sent as multipart form field `file`, or a raw text/csv body. CSV input
+    is parsed straight off the request stream. Returns a list of dicts.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get(key)
+        if not isinstance(data, list):
+            raise UploadError(f'Expected a JSON array of {key}')
+        return data
+
+    if 'file' in request.files:
+        stream = request.files['file'].stream
+    elif request.mimetype == 'text/csv':
+        stream = request.stream
+    else:
+        raise UploadError('Send a JSON array, a text/csv body or a CSV file upload')
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if not reader.fieldnames:
+        raise UploadError('CSV upload has no header row')
+    return [
+        {(field or '').strip(): (value.strip() if isinstance(value, str) else value)
+         for field, value in row.items()}
+        for row in reader
+    ]
+
+def _to_int(value, field):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise ValueError(f'{field} must be an integer')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be an integer')
+
+def validate_team_rows(rows, tournament_id):
+    """Validate every team row up front.
+
+    Returns (values, errors): the insert parameters for each row and a list of
+    {'row', 'error'} entries. Rows are numbered from 1.
+    """
+    values = []
+    errors = []
+    for index, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('Row must be an object')
+            name = row.get('name')
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError('Team name is required')
+            if len(name.strip()) > 100:
+                raise ValueError('Team name must be 100 characters or fewer')
+            team_values = {'tournament_id': tournament_id, 'name': name.strip(), 'ties': 0}
+            for field in TEAM_STAT_FIELDS:
+                team_values[field] = _to_int(row.get(field), field)
+            values.append(team_values)
+        except ValueError as e:
+            errors.append({'row': index, 'error': str(e)})
+    return values, errors
+
+def _to_optional_int(value, field):
+    if value is None or value == '':
+        return None
+    return _to_int(value, field)
+
+def validate_game_rows(rows, tournament_id):
+    """Validate every scheduled game row up front.
+
+    Dates and times are parsed in a single pass over the rows and all team IDs
+    are checked against the tournament's teams with one IN query. Returns
+    (values, errors) like validate_team_rows.
+    """
+    values = []
+    errors = []
+    parsed = []
+    team_ids = set()
+    for index, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('Row must be an object')
+            missing = [field for field in GAME_REQUIRED_FIELDS if row.get(field) in (None, '')]
+            if missing:
+                raise ValueError(f'Missing required fields: {", ".join(missing)}')
+            try:
+                game_date = datetime.strptime(str(row['date']), '%Y-%m-%d').date()
+                game_time = datetime.strptime(str(row['time']), '%H:%M').time()
+            except ValueError:
+                raise ValueError('Invalid date or time format. Use YYYY-MM-DD for date and HH:MM for time')
+            team1_id = _to_int(row['team1_id'], 'team1_id')
+            team2_id = _to_int(row['team2_id'], 'team2_id')
+            if team1_id == team2_id:
+                raise ValueError('A team cannot play against itself')
+            team_ids.update((team1_id, team2_id))
+            parsed.append((index, {
+                'tournament_id': tournament_id,
+                'team1_id': team1_id,
+                'team2_id': team2_id,
+                'date': game_date,
+                'time': game_time,
+                'field': str(row['field']),
+                'team1_score': _to_optional_int(row.get('team1_score'), 'team1_score'),
+                'team2_score': _to_optional_int(row.get('team2_score'), 'team2_score'),
+                'status': row.get('status') or 'Scheduled',
+                'game_type': 'Pool Play',
+                'bracket_match_id': None
+            }))
+        except ValueError as e:
+            errors.append({'row': index, 'error': str(e)})
+
+    existing = set()
+    if team_ids:
+        existing = set(db.session.execute(
+            db.select(Team.id).where(Team.tournament_id == tournament_id, Team.id.in_(team_ids))
+        ).scalars())
+
+    for index, game_values in parsed:
+        if game_values['team1_id'] not in existing or game_values['team2_id'] not in existing:
+            errors.append({'row': index, 'error': 'One or both teams not found'})
+        else:
+            values.append(game_values)
+
+    errors.sort(key=lambda error: error['row'])
+    return values, errors
@@ -0,0 +1,102 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from database import db
+
+# Log requests slower than this many milliseconds, or running more SQL
+# statements than this; 0 turns the check off
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 0))
+
+class RequestTiming:
+    """What one request spent: SQL statements and their time, JSON encoding, and the whole handler"""
+    __slots__ = ('started', 'queries', 'db_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+def current_timing():
+    """The current request's RequestTiming, or None outside an instrumented request"""
+    if has_request_context():
+        return g.get('request_timing')
+    return None
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the request's serialization time"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = current_timing()
+        if timing is not None:
+            timing.serialize_seconds += time.perf_counter() - started
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing every encode (jsonify and queued events)"""
+
+    def dumps(self, obj, **kwargs):
+        with timed_serialization():
+            return super().dumps(obj, **kwargs)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    timing = current_timing()
+    if timing is not None and started is not None:
+        timing.queries += 1
+        timing.db_seconds += time.perf_counter() - started
+
+def _start_timing():
+    g.request_timing = RequestTiming()
+
+def _finish_timing(response):
+    timing = current_timing()
+    if timing is None:
+        return response
+    total_ms = (time.perf_counter() - timing.started) * 1000
+    db_ms = timing.db_seconds * 1000
+    serialize_ms = timing.serialize_seconds * 1000
+
+    response.headers['Server-Timing'] = (
+        f'db;dur={db_ms:.2f};desc="{timing.queries} queries", '
+        f'serialize;dur={serialize_ms:.2f}, '
+        f'handler;dur={total_ms:.2f}'
+    )
+    # Let the frontend's origin read the timings from the Resource Timing API
+    response.headers['Timing-Allow-Origin'] = '*'
+
+    if ((SLOW_REQUEST_MS and total_ms >= SLOW_REQUEST_MS)
+            or (SLOW_REQUEST_QUERIES and timing.queries >= SLOW_REQUEST_QUERIES)):
+        current_app.logger.warning(
+            'Slow request %s %s -> %s: %.1f ms, %d queries (%.1f ms), serialize %.1f ms',
+            request.method, request.full_path.rstrip('?'), response.status_code,
+            total_ms, timing.queries, db_ms, serialize_ms
+        )
+    return response
+
+def init_instrumentation(app):
+    """Time every request and report it in a Server-Timing header.
+
+    Engine events count each SQL statement and its time on whichever engine
+    runs it, JSON encoding is timed through the app's JSON provider (and
+    serializers.json_response), and the handler time runs from the first
+    before_request hook to after_request. Call after the engines exist and
+    before any other before_request hook is registered, so the handler
+    time covers them.
+    """
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
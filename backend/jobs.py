@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app, g
+from sqlalchemy import update
+from database import db
+from models import Job
+from tournaments import current_tournament_id
+
+# Threads per process running background jobs. SQLite has one writer, so
+# more than one mostly adds lock waits; 0 runs every job inline in the
+# request that submits it (tests, benchmarks)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+
+# Rows a job writes per transaction, so the write lock is never held for long
+JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', 500))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+class JobConflict(Exception):
+    """The tournament already has a job queued or running"""
+
+    def __init__(self, job):
+        super().__init__(f'Job {job.id} ({job.kind}) is still {job.status} for this tournament')
+        self.job = job
+
+class JobFailed(Exception):
+    """A job stopped on a condition the user can fix; the message becomes the job's error"""
+
+class JobProgress:
+    """Handed to a task; progress is written in the task's current transaction"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def set_total(self, total):
+        db.session.execute(update(Job).where(Job.id == self.job_id).values(total=total))
+
+    def advance(self, rows):
+        db.session.execute(update(Job).where(Job.id == self.job_id).values(progress=Job.progress + rows))
+
+def chunks(rows, size=None):
+    """Consecutive slices of rows, JOB_CHUNK_SIZE long by default"""
+    size = size or JOB_CHUNK_SIZE
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    # Threads do not survive a fork, so every worker process gets its own pool
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+            _executor_pid = os.getpid()
+        return _executor
+
+def _finish(job_id, status, result=None, error=None):
+    db.session.execute(update(Job).where(Job.id == job_id).values(
+        status=status,
+        result=json.dumps(result) if result is not None else None,
+        error=error[:500] if error else None,
+        finished_at=datetime.now()
+    ))
+    db.session.commit()
+
+def _run(app, job_id, task, params):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        # Tasks read the tournament the way request handlers do
+        g.tournament_id = job.tournament_id
+        job.status = 'running'
+        job.started_at = datetime.now()
+        db.session.commit()
+        try:
+            result = task(JobProgress(job_id), **params)
+        except JobFailed as e:
+            db.session.rollback()
+            _finish(job_id, 'failed', error=str(e))
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception('Job %s (%s) failed', job_id, task.__name__)
+            _finish(job_id, 'failed', error=str(e))
+        else:
+            _finish(job_id, 'succeeded', result=result)
+
+def submit_job(kind, task, **params):
+    """Record a job for the current tournament and run task(progress, **params) in the background.
+
+    The task returns the JSON result that GET /api/jobs/<id> reports; what it
+    leaves uncommitted commits in the same transaction as that result, and
+    is rolled back if it raises. Raises JobConflict if the tournament already
+    has an active job; the check and the insert share one write transaction.
+    """
+    tournament_id = current_tournament_id()
+    active = Job.query.filter(Job.tournament_id == tournament_id, Job.status.in_(ACTIVE_STATUSES)).first()
+    if active is not None:
+        db.session.rollback()
+        raise JobConflict(active)
+    job = Job(tournament_id=tournament_id, kind=kind, status='queued', progress=0, worker_pid=os.getpid())
+    db.session.add(job)
+    db.session.flush()
+    # Read before committing: the expired row would check the writer connection out again
+    job_id = job.id
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if JOB_WORKERS > 0:
+        _get_executor().submit(_run, app, job_id, task, params)
+    else:
+        _run(app, job_id, task, params)
+    return db.session.get(Job, job_id)
+
+def fail_interrupted_jobs(pid=None):
+    """Mark jobs that were queued or running in a process that is gone (every process if pid is None) as failed"""
+    query = update(Job).where(Job.status.in_(ACTIVE_STATUSES))
+    if pid is not None:
+        query = query.where(Job.worker_pid == pid)
+    db.session.execute(query.values(status='failed', error='Interrupted by a server restart',
+                                    finished_at=datetime.now()))
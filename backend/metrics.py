@@ -0,0 +1,305 @@
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+from database import db, lock_waits
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Under Gunicorn every worker writes its metrics to a file in this directory
+# (gunicorn.conf.py sets it up) and /metrics adds them up; unset, /metrics
+# reports the current process only
+METRICS_DIR_ENV = 'METRICS_DIR'
+
+# How often a worker rewrites its file while it is serving requests
+FLUSH_INTERVAL = 1.0
+
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _metrics_dir():
+    return os.environ.get(METRICS_DIR_ENV) or None
+
+def _worker_file(directory, pid):
+    return os.path.join(directory, f'worker-{pid}.json')
+
+class RequestMetrics:
+    """Request counters and latency histograms for one process.
+
+    Recording a request is a lock, two dict lookups and a bisect. Label
+    tuples are joined with tabs so a snapshot is plain JSON and can be
+    merged with other workers' snapshots.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}    # 'method\troute\tstatus' -> count
+        self._errors = {}      # 'method\troute' -> count of 5xx responses
+        self._latency = {}     # 'method\troute' -> bucket counts + [sum, count]
+        self._changed = False
+        self._flusher_pid = None
+
+    def record(self, method, route, status, seconds):
+        key = f'{method}\t{route}'
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            status_key = f'{key}\t{status}'
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            if status >= 500:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            histogram[bucket] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+            self._changed = True
+
+    def snapshot(self):
+        """Counters and gauges of this process as a JSON-ready dict"""
+        with self._lock:
+            snapshot = {
+                'requests': dict(self._requests),
+                'errors': dict(self._errors),
+                'latency': {key: list(histogram) for key, histogram in self._latency.items()},
+            }
+        snapshot['lock_waits'] = {bind: list(stats) for bind, stats in lock_waits.snapshot().items()}
+        snapshot['busy_errors'] = dict(busy_errors)
+        snapshot['pools'] = pool_usage()
+        return snapshot
+
+    def start_flusher(self, app):
+        """Make sure this process has a thread writing its snapshot for the other workers' /metrics.
+
+        Threads do not survive a fork, so each worker starts its own on its first request.
+        """
+        pid = os.getpid()
+        if self._flusher_pid == pid or _metrics_dir() is None:
+            return
+        self._flusher_pid = pid
+        threading.Thread(target=self._flush_periodically, args=(app,), name='metrics-flusher', daemon=True).start()
+
+    def _flush_periodically(self, app):
+        path = _worker_file(_metrics_dir(), os.getpid())
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            if not self._changed:
+                continue
+            self._changed = False
+            temporary = f'{path}.tmp'
+            try:
+                with app.app_context(), open(temporary, 'w') as output:
+                    json.dump(self.snapshot(), output)
+                os.replace(temporary, path)
+            except OSError:
+                # Try again on the next round
+                self._changed = True
+
+request_metrics = RequestMetrics()
+
+# 'database is locked' errors per bind, after busy_timeout ran out
+busy_errors = {}
+
+def pool_usage():
+    """Connection pool size and checked-out connections per bind, for pools that report them"""
+    pools = {}
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        pools[bind_key or 'default'] = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        }
+    return pools
+
+def _busy_error_counter(bind_key):
+    def count_busy_error(context):
+        if 'database is locked' in str(context.original_exception):
+            busy_errors[bind_key] = busy_errors.get(bind_key, 0) + 1
+    return count_busy_error
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        request_metrics.record(request.method, route, response.status_code, time.perf_counter() - started)
+        request_metrics.start_flusher(current_app._get_current_object())
+    return response
+
+def init_metrics(app):
+    """Record every request and count SQLite lock errors; /metrics renders them"""
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            event.listen(engine, 'handle_error', _busy_error_counter(bind_key or 'default'))
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+def _merge_counters(total, snapshot):
+    """Add one snapshot's counters and histograms into total"""
+    for name in ('requests', 'errors', 'busy_errors'):
+        counters = total.setdefault(name, {})
+        for key, value in snapshot.get(name, {}).items():
+            counters[key] = counters.get(key, 0) + value
+    for name in ('latency', 'lock_waits'):
+        series = total.setdefault(name, {})
+        for key, values in snapshot.get(name, {}).items():
+            if key in series:
+                series[key] = [current + value for current, value in zip(series[key], values)]
+            else:
+                series[key] = list(values)
+    return total
+
+def _merge_gauges(total, snapshot):
+    pools = total.setdefault('pools', {})
+    for bind, usage in snapshot.get('pools', {}).items():
+        merged = pools.setdefault(bind, dict.fromkeys(usage, 0))
+        for key, value in usage.items():
+            merged[key] = merged.get(key, 0) + value
+    return total
+
+def collect_metrics():
+    """This process's snapshot added to every other live worker's file and the dead workers' archive"""
+    own = request_metrics.snapshot()
+    directory = _metrics_dir()
+    if directory is None:
+        return own
+
+    total = _merge_gauges(_merge_counters({}, own), own)
+    own_file = _worker_file(directory, os.getpid())
+    with _directory_lock(directory, exclusive=False):
+        archived = _read(os.path.join(directory, ARCHIVE_FILE))
+        if archived:
+            _merge_counters(total, archived)
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not (name.startswith('worker-') and name.endswith('.json')) or path == own_file:
+                continue
+            snapshot = _read(path)
+            if snapshot:
+                _merge_gauges(_merge_counters(total, snapshot), snapshot)
+    return total
+
+def mark_process_dead(pid, directory=None):
+    """Fold a dead worker's counters into the archive so totals never go backwards.
+
+    Called by the Gunicorn master when a worker exits; its pool gauges are dropped.
+    """
+    directory = directory or _metrics_dir()
+    if directory is None:
+        return
+    path = _worker_file(directory, pid)
+    with _directory_lock(directory, exclusive=True):
+        snapshot = _read(path)
+        if snapshot is None:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archived = _merge_counters(_read(archive_path) or {}, snapshot)
+        archived.pop('pools', None)
+        temporary = f'{archive_path}.tmp'
+        with open(temporary, 'w') as output:
+            json.dump(archived, output)
+        os.replace(temporary, archive_path)
+        os.remove(path)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def render_metrics(snapshot):
+    """Prometheus text exposition format for a (merged) snapshot"""
+    lines = [
+        '# HELP tournament_http_requests_total HTTP requests by route, method and status.',
+        '# TYPE tournament_http_requests_total counter',
+    ]
+    for key, count in sorted(snapshot.get('requests', {}).items()):
+        method, route, status = key.split('\t')
+        lines.append(f'tournament_http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+    lines += [
+        '# HELP tournament_http_request_errors_total HTTP requests answered with a 5xx status.',
+        '# TYPE tournament_http_request_errors_total counter',
+    ]
+    for key, count in sorted(snapshot.get('errors', {}).items()):
+        method, route = key.split('\t')
+        lines.append(f'tournament_http_request_errors_total{_labels(method=method, route=route)} {count}')
+
+    lines += [
+        '# HELP tournament_http_request_duration_seconds Request latency by route and method.',
+        '# TYPE tournament_http_request_duration_seconds histogram',
+    ]
+    for key, histogram in sorted(snapshot.get('latency', {}).items()):
+        method, route = key.split('\t')
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram):
+            cumulative += count
+            labels = _labels(method=method, route=route, le=bound)
+            lines.append(f'tournament_http_request_duration_seconds_bucket{labels} {cumulative}')
+        labels = _labels(method=method, route=route)
+        lines.append(f'tournament_http_request_duration_seconds_sum{labels} {histogram[-2]:.6f}')
+        lines.append(f'tournament_http_request_duration_seconds_count{labels} {histogram[-1]}')
+
+    lines += [
+        '# HELP tournament_db_pool_connections Pooled database connections by state, summed over workers.',
+        '# TYPE tournament_db_pool_connections gauge',
+    ]
+    for bind, usage in sorted(snapshot.get('pools', {}).items()):
+        lines.append(f'tournament_db_pool_connections{_labels(bind=bind, state="checked_out")} {usage["checked_out"]}')
+        lines.append(f'tournament_db_pool_connections{_labels(bind=bind, state="overflow")} {usage["overflow"]}')
+    lines += [
+        '# HELP tournament_db_pool_size Configured pool size, summed over workers.',
+        '# TYPE tournament_db_pool_size gauge',
+    ]
+    for bind, usage in sorted(snapshot.get('pools', {}).items()):
+        lines.append(f'tournament_db_pool_size{_labels(bind=bind)} {usage["size"]}')
+
+    lines += [
+        '# HELP tournament_sqlite_lock_waits_total Transactions whose BEGIN waited for another connection\'s lock.',
+        '# TYPE tournament_sqlite_lock_waits_total counter',
+    ]
+    for bind, (count, seconds) in sorted(snapshot.get('lock_waits', {}).items()):
+        lines.append(f'tournament_sqlite_lock_waits_total{_labels(bind=bind)} {count}')
+    lines += [
+        '# HELP tournament_sqlite_lock_wait_seconds_total Time spent waiting for SQLite locks.',
+        '# TYPE tournament_sqlite_lock_wait_seconds_total counter',
+    ]
+    for bind, (count, seconds) in sorted(snapshot.get('lock_waits', {}).items()):
+        lines.append(f'tournament_sqlite_lock_wait_seconds_total{_labels(bind=bind)} {seconds:.6f}')
+    lines += [
+        '# HELP tournament_sqlite_busy_errors_total Statements that failed with "database is locked".',
+        '# TYPE tournament_sqlite_busy_errors_total counter',
+    ]
+    for bind, count in sorted(snapshot.get('busy_errors', {}).items()):
+        lines.append(f'tournament_sqlite_busy_errors_total{_labels(bind=bind)} {count}')
+
+    return '\n'.join(lines) + '\n'
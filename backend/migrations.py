@@ -0,0 +1,105 @@
+from sqlalchemy import MetaData, UniqueConstraint, inspect
+from sqlalchemy.schema import CreateColumn
+from database import db
+
+# Winner advancement of the hard-coded 6-team bracket that predates the
+# bracket engine: match_display_id -> (next match, slot)
+LEGACY_SIX_TEAM_LINKS = {1: (3, 2), 2: (4, 2), 3: (5, 1), 4: (5, 2)}
+
+def _link_legacy_brackets(connection):
+    """Give brackets generated before the advancement table existed their links"""
+    for match_display_id, (next_match, next_slot) in LEGACY_SIX_TEAM_LINKS.items():
+        connection.exec_driver_sql(
+            'UPDATE bracket_match SET winner_next_match = ?, winner_next_slot = ? WHERE match_display_id = ?',
+            (next_match, next_slot, match_display_id)
+        )
+
+# Data fix-ups to run when a column is first added to an existing table
+COLUMN_BACKFILLS = {
+    ('bracket_match', 'winner_next_match'): _link_legacy_brackets,
+}
+
+def _declared_unique_columns(table):
+    declared = {(column.name,) for column in table.columns if column.unique}
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            declared.add(tuple(column.name for column in constraint.columns))
+    return declared
+
+def _rebuild_table(connection, table):
+    """Recreate a table from the model and copy its rows across.
+
+    SQLite cannot drop a constraint in place, so this follows its documented
+    procedure: create the new table under a temporary name, copy, drop the
+    old table and rename the new one. Indexes are created afterwards by
+    upgrade_schema.
+    """
+    preparer = connection.dialect.identifier_preparer
+    # Copy into scratch metadata (with the tables it references) so the app's metadata is untouched
+    scratch = MetaData()
+    for other in table.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(scratch)
+    new_table = table.to_metadata(scratch, name=f'_new_{table.name}')
+    for index in list(new_table.indexes):
+        new_table.indexes.discard(index)
+    new_table.create(connection)
+
+    existing_columns = {column['name'] for column in inspect(connection).get_columns(table.name)}
+    columns = ', '.join(preparer.quote(column.name) for column in table.columns if column.name in existing_columns)
+    connection.exec_driver_sql(
+        f'INSERT INTO {preparer.format_table(new_table)} ({columns}) '
+        f'SELECT {columns} FROM {preparer.format_table(table)}'
+    )
+    connection.exec_driver_sql(f'DROP TABLE {preparer.format_table(table)}')
+    connection.exec_driver_sql(
+        f'ALTER TABLE {preparer.format_table(new_table)} RENAME TO {preparer.format_table(table)}'
+    )
+
+def upgrade_schema():
+    """Bring an existing tournament.db up to date with the models.
+
+    db.create_all() only creates missing tables, so databases created by an
+    earlier version never receive columns or indexes that were added to
+    existing tables later. Add any column the models declare but the database
+    lacks (new columns must be nullable or have a server default, and
+    COLUMN_BACKFILLS can fill them in), rebuild tables that still carry a
+    unique constraint the models dropped, drop ix_ indexes the models no
+    longer declare and create any missing index.
+    """
+    engine = db.engine
+    existing_tables = set(inspect(engine).get_table_names())
+    preparer = engine.dialect.identifier_preparer
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        inspector = inspect(engine)
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        missing_columns = [column for column in table.columns if column.name not in existing_columns]
+        if missing_columns:
+            with engine.begin() as connection:
+                for column in missing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}')
+                for column in missing_columns:
+                    backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                    if backfill:
+                        backfill(connection)
+
+        existing_uniques = {tuple(constraint['column_names'])
+                            for constraint in inspector.get_unique_constraints(table.name)}
+        if existing_uniques - _declared_unique_columns(table):
+            with engine.begin() as connection:
+                _rebuild_table(connection, table)
+
+        inspector = inspect(engine)
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        declared_indexes = {index.name for index in table.indexes}
+        for name in existing_indexes - declared_indexes:
+            if name and name.startswith('ix_'):
+                with engine.begin() as connection:
+                    connection.exec_driver_sql(f'DROP INDEX {preparer.quote(name)}')
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
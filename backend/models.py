@@ -1,8 +1,11 @@
+import json
+from sqlalchemy import or_
 from database import db
 from datetime import datetime
 
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False, server_default='1')
     name = db.Column(db.String(100), nullable=False)
     wins = db.Column(db.Integer, default=0)
     losses = db.Column(db.Integer, default=0)
@@ -11,6 +14,10 @@ class Team(db.Model):
     runs_allowed = db.Column(db.Integer, default=0)
     run_differential = db.Column(db.Integer, default=0)
     games_played = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_team_tournament_id', 'tournament_id'),
+    )
 
     def __repr__(self):
         return f'<Team {self.name}>'
@@ -18,6 +25,7 @@ class Team(db.Model):
     def to_dict(self):
         return {
             'id': self.id,
+            'tournament_id': self.tournament_id,
             'name': self.name,
             'wins': self.wins,
             'losses': self.losses,
@@ -28,8 +36,27 @@ class Team(db.Model):
             'games_played': self.games_played
         }
 
+class Standing(db.Model):
+    """Materialized rankings row for a team, kept in sync by the write routes"""
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False, server_default='1')
+    points = db.Column(db.Integer, nullable=False, default=0)
+    win_percentage = db.Column(db.Float, nullable=False, default=0.0)
+    rank = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_standing_tournament_rank', 'tournament_id', 'rank'),
+    )
+
+    # Relationships
+    team = db.relationship('Team', backref=db.backref('standing', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<Standing {self.team_id}: #{self.rank}>'
+
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False, server_default='1')
     team1_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     team2_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     team1_score = db.Column(db.Integer, nullable=True)
@@ -40,17 +67,42 @@ class Game(db.Model):
     status = db.Column(db.String(20), default='Scheduled')  # Scheduled, Completed, Cancelled
     game_type = db.Column(db.String(20), default='Pool Play')  # Pool Play, Bracket
     bracket_match_id = db.Column(db.Integer, nullable=True)  # Reference to a bracket match if this is a bracket game
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # Bumped on every update; guards against conflicting re-scores
+    
+    __table_args__ = (
+        db.Index('ix_game_tournament_date_time', 'tournament_id', 'date', 'time'),
+        db.Index('ix_game_tournament_field_date_time', 'tournament_id', 'field', 'date', 'time'),
+        db.Index('ix_game_tournament_type_status', 'tournament_id', 'game_type', 'status'),
+        db.Index('ix_game_tournament_bracket_match', 'tournament_id', 'bracket_match_id'),
+        db.Index('ix_game_team1_id', 'team1_id'),
+        db.Index('ix_game_team2_id', 'team2_id'),
+    )
+    
+    # Every UPDATE checks and increments the version, so a stale write fails instead of overwriting
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     team1 = db.relationship('Team', foreign_keys=[team1_id], backref=db.backref('home_games', lazy=True))
     team2 = db.relationship('Team', foreign_keys=[team2_id], backref=db.backref('away_games', lazy=True))
 
+    # Only pool games count toward team stats, standings and tiebreakers;
+    # bracket games are played after seeding and only advance the bracket
+    @classmethod
+    def pool_play(cls):
+        """SQL condition matching pool games (older rows may have no game_type)"""
+        return or_(cls.game_type.is_(None), cls.game_type != 'Bracket')
+
+    @property
+    def is_pool_play(self):
+        return self.game_type != 'Bracket'
+
     def __repr__(self):
         return f'<Game {self.id}: {self.team1.name} vs {self.team2.name}>'
     
     def to_dict(self):
         return {
             'id': self.id,
+            'tournament_id': self.tournament_id,
             'team1_id': self.team1_id,
             'team2_id': self.team2_id,
             'team1_name': self.team1.name if self.team1 else None,
@@ -62,7 +114,8 @@ class Game(db.Model):
             'field': self.field,
             'status': self.status,
             'game_type': self.game_type,
-            'bracket_match_id': self.bracket_match_id
+            'bracket_match_id': self.bracket_match_id,
+            'version': self.version
         }
 
 class Bracket(db.Model):
@@ -81,7 +134,8 @@ class Bracket(db.Model):
 
 class BracketMatch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    match_display_id = db.Column(db.Integer, unique=True, nullable=False)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False, server_default='1')
+    match_display_id = db.Column(db.Integer, nullable=False)  # Unique within a tournament
     round_number = db.Column(db.Integer, nullable=False)
     team1_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
     team2_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
@@ -91,6 +145,17 @@ class BracketMatch(db.Model):
     team2_seed = db.Column(db.Integer, nullable=True)
     winner_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
     status = db.Column(db.String(20), default='Scheduled')
+    bracket_side = db.Column(db.String(10), nullable=False, server_default='winners')  # winners, losers, final
+    # Advancement table: the match_display_id and slot (1 = team1, 2 = team2) the winner and loser play next
+    winner_next_match = db.Column(db.Integer, nullable=True)
+    winner_next_slot = db.Column(db.Integer, nullable=True)
+    loser_next_match = db.Column(db.Integer, nullable=True)
+    loser_next_slot = db.Column(db.Integer, nullable=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'match_display_id', name='uq_bracket_match_tournament_display'),
+        db.Index('ix_bracket_match_tournament_round', 'tournament_id', 'round_number', 'match_display_id'),
+    )
     
     def __repr__(self):
         return f'<BracketMatch {self.match_display_id}>'
@@ -98,6 +163,7 @@ class BracketMatch(db.Model):
     def to_dict(self):
         return {
             'id': self.id,
+            'tournament_id': self.tournament_id,
             'matchId': self.match_display_id,
             'round': self.round_number,
             'team1_id': self.team1_id,
@@ -107,18 +173,131 @@ class BracketMatch(db.Model):
             'team1_seed': self.team1_seed,
             'team2_seed': self.team2_seed,
             'winner_id': self.winner_id,
-            'status': self.status
+            'status': self.status,
+            'bracket': self.bracket_side,
+            'winner_next_match': self.winner_next_match,
+            'loser_next_match': self.loser_next_match
+        }
+
+class DataVersion(db.Model):
+    """Single-row counter bumped in the same transaction as every committed write"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.version}>'
+
+class Change(db.Model):
+    """Change-log entry: the latest write to one team, game or bracket match.
+
+    Compacted to one row per (tournament, entity, entity_id): logging a row
+    again deletes its previous entry, so seq only ever moves forward.
+    """
+    __tablename__ = 'change_log'
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # team, game, bracket_match
+    entity_id = db.Column(db.Integer, nullable=False)  # match_display_id for bracket matches
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'entity', 'entity_id', name='uq_change_log_entity'),
+        db.Index('ix_change_log_tournament_seq', 'tournament_id', 'seq'),
+        db.Index('ix_change_log_tournament_deleted_seq', 'tournament_id', 'deleted', 'seq'),
+        # Never hand out a seq twice, even after the newest entry is deleted
+        {'sqlite_autoincrement': True},
+    )
+    
+    def __repr__(self):
+        return f'<Change {self.seq}: {self.entity} {self.entity_id}>'
+
+class ChangeHorizon(db.Model):
+    """Per tournament, the newest change-log seq that compaction may have dropped"""
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), primary_key=True)
+    seq = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ChangeHorizon {self.tournament_id}: {self.seq}>'
+
+class LiveEvent(db.Model):
+    """A committed change event, kept briefly so every worker's /api/events streams can send it.
+
+    Written in the transaction that made the change; SQLite's single writer
+    hands out ids in commit order, so the id doubles as the SSE event id.
+    """
+    __tablename__ = 'event_log'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON, encoded once when the event was queued
+    
+    # Never hand out an id twice, so a client's Last-Event-ID stays meaningful after pruning
+    __table_args__ = ({'sqlite_autoincrement': True},)
+    
+    def __repr__(self):
+        return f'<LiveEvent {self.id}: {self.event_type}>'
+
+class Job(db.Model):
+    """A background job (bracket generation, reset, bulk import) and its progress"""
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament_settings.id'), nullable=False)
+    kind = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # Rows done so far
+    total = db.Column(db.Integer, nullable=True)  # Rows to do, once known
+    result = db.Column(db.Text, nullable=True)  # JSON, what the route used to return
+    error = db.Column(db.String(500), nullable=True)
+    worker_pid = db.Column(db.Integer, nullable=True)  # Process that runs the job
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_job_tournament_status', 'tournament_id', 'status'),
+        db.Index('ix_job_status_worker', 'status', 'worker_pid'),
+    )
+    
+    def __repr__(self):
+        return f'<Job {self.id}: {self.kind} {self.status}>'
+    
+    def to_dict(self, include_result=True):
+        data = {
+            'id': self.id,
+            'tournament_id': self.tournament_id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
         }
+        if include_result:
+            data['result'] = json.loads(self.result) if self.result else None
+        return data
 
 class TournamentSettings(db.Model):
+    """A tournament: its settings row, whose id scopes its teams, games and bracket"""
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, default="Baseball Tournament")
     description = db.Column(db.String(500), nullable=True)
     admin_password = db.Column(db.String(100), nullable=True)
+    tiebreakers = db.Column(db.String(200), nullable=True)  # Comma-separated ranking chain; NULL uses the default
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
     def __repr__(self):
         return f'<TournamentSettings {self.id}>'
+    
+    def to_summary(self):
+        """Public listing entry, without the admin password"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description
+        }
         
     def to_dict(self):
         return {
@@ -126,5 +305,6 @@ class TournamentSettings(db.Model):
             'name': self.name,
             'description': self.description,
             'adminPassword': self.admin_password,
+            'tiebreakers': self.tiebreakers.split(',') if self.tiebreakers else [],
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
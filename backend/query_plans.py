@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Query-plan regression check for the hot read and write paths.
+
+Sends the requests behind every page load and score update to a tournament
+through the app itself, records each SQL statement the app runs for them,
+and runs EXPLAIN QUERY PLAN on it with the parameters it ran with. Exits
+non-zero if SQLite plans a full table scan for any of them. Every hot
+statement is scoped to one tournament (or to rows looked up by id), so a
+scan would also read every other tournament's rows.
+
+Usage: python query_plans.py   (on a scratch database; DATABASE_URL is ignored)
+"""
+import base64
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Statements EXPLAIN QUERY PLAN has something to say about
+PLANNED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+def seed_tournament(client, headers, team_count=8):
+    """Fill a tournament through the API: teams, a round robin with half of it scored, and a bracket.
+
+    Returns the team ids, in ascending order, and the schedule.
+    """
+    response = client.post('/api/teams/bulk', json=[{'name': f'Team {n}'} for n in range(team_count)],
+                           headers=headers)
+    assert response.get_json()['status'] == 'succeeded', response.get_json()
+    team_ids = sorted(team['id'] for team in client.get('/api/teams', headers=headers).get_json())
+    response = client.post('/api/schedule/bulk', json=[
+        {'team1_id': team1_id, 'team2_id': team2_id, 'date': '2026-06-01', 'time': '10:00', 'field': 'Field 1'}
+        for team1_id in team_ids for team2_id in team_ids if team1_id < team2_id
+    ], headers=headers)
+    assert response.get_json()['status'] == 'succeeded', response.get_json()
+    games = client.get('/api/schedule', headers=headers).get_json()
+    for game in games[::2]:
+        client.put(f"/api/schedule/{game['id']}/score", json={'team1_score': 5, 'team2_score': 3},
+                   headers=headers)
+    response = client.post('/brackets/generate', json={'teams': 4}, headers=headers)
+    assert response.get_json()['status'] == 'succeeded', response.get_json()
+    return team_ids, client.get('/api/schedule', headers=headers).get_json()
+
+def hot_requests(team_ids, games):
+    """(method, url, json) of the requests that run on every page load or score update, by name"""
+    game = next(game for game in games if game['game_type'] != 'Bracket' and game['status'] == 'Scheduled')
+    scores = [game for game in games if game['game_type'] != 'Bracket'][:4]
+    cursor = base64.urlsafe_b64encode(f"{game['date']}|{game['time']}|{game['id']}".encode()).decode().rstrip('=')
+    return {
+        'get_teams': ('GET', '/api/teams', None),
+        'get_rankings': ('GET', '/rankings', None),
+        'get_schedule': ('GET', '/api/schedule', None),
+        'get_schedule page': ('GET', f'/api/schedule?limit=5&cursor={cursor}', None),
+        'get_schedule date': ('GET', f"/api/schedule?date={game['date']}&exclude_status=Completed", None),
+        'get_schedule field': ('GET', f"/api/schedule?field={game['field']}&date_from={game['date']}&limit=50", None),
+        'get_schedule team': ('GET', f'/api/schedule?team={team_ids[0]}', None),
+        'get_game': ('GET', f"/api/schedule/{game['id']}", None),
+        'get_bracket': ('GET', '/brackets', None),
+        'get_changes': ('GET', '/api/changes?since=1', None),
+        'get_jobs': ('GET', '/api/jobs', None),
+        'seeding_odds': ('GET', '/api/standings/seeding-odds?simulations=10&teams=4', None),
+        'update_game': ('PUT', f"/api/schedule/{game['id']}", {'field': game['field']}),
+        'update_game_score': ('PUT', f"/api/schedule/{game['id']}/score", {'team1_score': 2, 'team2_score': 1}),
+        'update_scores': ('PUT', '/api/schedule/scores', [
+            {'id': game['id'], 'team1_score': 4, 'team2_score': 1, 'status': 'Completed'} for game in scores
+        ]),
+        'update_bracket_match': ('PATCH', '/brackets/match/1', {'team1_score': 5, 'team2_score': 2}),
+        'rebuild_standings': ('POST', '/api/standings/rebuild', {'dry_run': True}),
+        'generate_bracket': ('POST', '/brackets/generate', {'teams': 4}),
+        'reset_tournament': ('POST', '/api/reset', None),
+    }
+
+@contextmanager
+def recorded_statements(engines):
+    """Collect (sql, parameters) of every plannable statement run on engines, once each"""
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(PLANNED_STATEMENTS):
+            if executemany and isinstance(parameters, list):
+                parameters = parameters[0]
+            statements.setdefault(statement, tuple(parameters))
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+
+def explain(connection, statement, parameters=()):
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    return [row[-1] for row in rows]
+
+def full_scans(plan):
+    """The plan lines that read a whole table.
+
+    "SCAN game" is a table scan; "SCAN game USING INDEX ..." walks an index
+    in order. A scan of a subquery's rows (a CO-ROUTINE or MATERIALIZE step)
+    reads only what the subquery found, and "SCAN 2 CONSTANT ROWS" is the
+    VALUES list of a multi-row INSERT.
+    """
+    derived = {detail.split(' ', 1)[1] for detail in plan if detail.startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+    return [detail for detail in plan
+            if detail.startswith('SCAN ') and ' USING ' not in detail and not detail.endswith(' CONSTANT ROWS')
+            and detail[len('SCAN '):] not in derived]
+
+def check_query_plans(app, client, headers):
+    """Send the hot requests to a freshly seeded tournament; return (name, sql, plan lines, ok) per statement"""
+    from database import db
+
+    team_ids, games = seed_tournament(client, headers)
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    results = []
+    for name, (method, url, body) in hot_requests(team_ids, games).items():
+        with recorded_statements(engines) as statements:
+            response = client.open(url, method=method, json=body, headers=headers)
+        assert response.status_code < 400, (name, response.status_code, response.get_data(as_text=True))
+        with app.app_context(), db.engine.connect() as connection:
+            for statement, parameters in statements.items():
+                plan = explain(connection, statement, parameters)
+                results.append((name, statement, plan, not full_scans(plan)))
+    return results
+
+if __name__ == '__main__':
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='query-plans-'), 'plans.db')}"
+    os.environ['JOB_WORKERS'] = '0'
+    os.environ['SIMULATION_PROCESSES'] = '0'
+    from app import app
+    from tournaments import TOURNAMENT_HEADER
+
+    client = app.test_client()
+    tournament = client.post('/api/tournaments', json={'name': 'Query plans'}).get_json()
+    results = check_query_plans(app, client, {TOURNAMENT_HEADER: str(tournament['id'])})
+
+    failures = 0
+    for name, statement, plan, ok in results:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {' '.join(statement.split())[:100]}")
+        for detail in plan:
+            print(f'       {detail}')
+        if not ok:
+            failures += 1
+
+    if failures:
+        print(f'\n{failures} hot statements fall back to a full table scan')
+        sys.exit(1)
@@ -0,0 +1,172 @@
+import numpy as np
+from database import db
+from models import Team, Game, TournamentSettings
+
+# Per-team counters a tiebreaker can compare, and whether more is better
+TEAM_STAT_KEYS = {
+    'points': True,
+    'win_percentage': True,
+    'wins': True,
+    'losses': False,
+    'runs_allowed': False,
+    'run_differential': True,
+    'runs_scored': True,
+}
+
+# Tiebreakers computed from the games played among the teams still tied
+HEAD_TO_HEAD_KEYS = {'head_to_head', 'head_to_head_run_differential'}
+
+TIEBREAKERS = set(TEAM_STAT_KEYS) | HEAD_TO_HEAD_KEYS
+
+# Used when a tournament has not configured its own chain; matches the
+# seeding order generate_bracket always used
+DEFAULT_TIEBREAKERS = ['points', 'runs_allowed', 'run_differential', 'runs_scored']
+
+def parse_tiebreakers(value):
+    """Turn a list or comma-separated string of tiebreaker names into a chain.
+
+    Raises ValueError for unknown names. An empty value means the default chain.
+    """
+    if value is None:
+        return list(DEFAULT_TIEBREAKERS)
+    names = value.split(',') if isinstance(value, str) else list(value)
+    chain = [str(name).strip() for name in names if str(name).strip()]
+    unknown = [name for name in chain if name not in TIEBREAKERS]
+    if unknown:
+        raise ValueError(f"Unknown tiebreakers: {', '.join(unknown)}. "
+                         f"Choose from: {', '.join(sorted(TIEBREAKERS))}")
+    return chain or list(DEFAULT_TIEBREAKERS)
+
+def tournament_tiebreakers(tournament_id):
+    """The tiebreaker chain configured for a tournament"""
+    stored = (db.session.query(TournamentSettings.tiebreakers)
+              .filter(TournamentSettings.id == tournament_id)
+              .scalar())
+    return parse_tiebreakers(stored)
+
+def team_stat_columns(wins, losses, ties, games_played, runs_scored, runs_allowed, run_differential):
+    """The stat tiebreakers from per-team counter arrays (of any shape, team on the last axis)"""
+    win_percentage = np.divide(wins, games_played, out=np.zeros_like(wins), where=games_played > 0)
+    return {
+        'points': 2 * wins + ties,
+        'win_percentage': np.round(win_percentage, 3),
+        'wins': wins,
+        'losses': losses,
+        'runs_scored': runs_scored,
+        'runs_allowed': runs_allowed,
+        'run_differential': run_differential,
+    }
+
+def team_stat_table(rows):
+    """Float array of (id, wins, losses, ties, games_played, runs_scored, runs_allowed,
+    run_differential) rows, NULL counters as 0"""
+    return np.nan_to_num(np.array(rows, dtype=np.float64).reshape(-1, 8))
+
+def team_stat_arrays(rows):
+    """Column arrays for the stat tiebreakers from (id, wins, losses, ties, games_played,
+    runs_scored, runs_allowed, run_differential) rows"""
+    table = team_stat_table(rows)
+    return table[:, 0].astype(np.int64), team_stat_columns(*table[:, 1:].T)
+
+def results_matrices(team_ids, games):
+    """Team x team head-to-head matrices from (team1_id, team2_id, team1_score, team2_score) rows.
+
+    points[i, j] is what team i earned against team j (2 a win, 1 a tie) and
+    run_differential[i, j] its runs for minus against in those games. team_ids
+    must be sorted. Games involving a team outside team_ids are ignored.
+    """
+    size = len(team_ids)
+    points = np.zeros((size, size), dtype=np.float64)
+    run_differential = np.zeros((size, size), dtype=np.float64)
+    games = np.array(games, dtype=np.int64).reshape(-1, 4)
+    if size == 0 or len(games) == 0:
+        return points, run_differential
+
+    team1 = np.searchsorted(team_ids, games[:, 0]).clip(max=size - 1)
+    team2 = np.searchsorted(team_ids, games[:, 1]).clip(max=size - 1)
+    known = (team_ids[team1] == games[:, 0]) & (team_ids[team2] == games[:, 1])
+    team1, team2, margin = team1[known], team2[known], games[known, 2] - games[known, 3]
+
+    # np.add.at accumulates repeated (i, j) pairs, so rematches add up
+    np.add.at(points, (team1, team2), np.where(margin > 0, 2, np.where(margin == 0, 1, 0)))
+    np.add.at(points, (team2, team1), np.where(margin < 0, 2, np.where(margin == 0, 1, 0)))
+    np.add.at(run_differential, (team1, team2), margin)
+    np.add.at(run_differential, (team2, team1), -margin)
+    return points, run_differential
+
+def _split_ties(groups, keys):
+    """Split tie groups by a key (higher ranks first); returns new group numbers in rank order.
+
+    Works row by row along the last axis, so a batch of rankings splits at once.
+    """
+    keys = np.broadcast_to(keys, groups.shape)
+    order = np.lexsort((-keys, groups), axis=-1)
+    sorted_groups = np.take_along_axis(groups, order, axis=-1)
+    sorted_keys = np.take_along_axis(keys, order, axis=-1)
+    starts = np.empty(groups.shape, dtype=bool)
+    starts[..., :1] = True
+    starts[..., 1:] = (sorted_groups[..., 1:] != sorted_groups[..., :-1]) | (sorted_keys[..., 1:] != sorted_keys[..., :-1])
+    refined = np.empty_like(groups)
+    np.put_along_axis(refined, order, np.cumsum(starts, axis=-1) - 1, axis=-1)
+    return refined
+
+def rank_order(team_ids, stats, chain, matrices=None):
+    """Indices into team_ids in rank order, resolving ties through the chain.
+
+    Teams start in one tie group; each tiebreaker splits the groups that are
+    still tied. A head-to-head tiebreaker compares only the games among the
+    teams of each group (a mini-league for multi-way ties) and is re-applied
+    while it keeps splitting groups, so a three-way tie that breaks into a
+    winner and a two-way tie is settled by the two remaining teams' own games.
+    Teams still tied at the end are ordered by id.
+
+    stats arrays (and matrices) may have leading batch axes, for example one
+    row per simulated season; the result then holds one ranking per row.
+    """
+    groups = np.zeros(np.shape(stats['points']), dtype=np.int64)
+    for name in chain:
+        if name in TEAM_STAT_KEYS:
+            keys = stats[name] if TEAM_STAT_KEYS[name] else -stats[name]
+            groups = _split_ties(groups, keys)
+            continue
+        matrix = matrices[0] if name == 'head_to_head' else matrices[1]
+        while True:
+            same_group = groups[..., :, None] == groups[..., None, :]
+            split = _split_ties(groups, (matrix * same_group).sum(axis=-1))
+            if np.array_equal(split.max(axis=-1, initial=-1), groups.max(axis=-1, initial=-1)):
+                break
+            groups = split
+    return np.lexsort((np.broadcast_to(team_ids, groups.shape), groups), axis=-1)
+
+def team_stat_rows(tournament_id):
+    """(id, wins, losses, ties, games_played, runs_scored, runs_allowed, run_differential)
+    of a tournament's teams, by id"""
+    rows = (db.session.query(Team.id, Team.wins, Team.losses, Team.ties, Team.games_played,
+                             Team.runs_scored, Team.runs_allowed, Team.run_differential)
+            .filter(Team.tournament_id == tournament_id)
+            .order_by(Team.id)
+            .all())
+    return [tuple(row) for row in rows]
+
+def completed_game_rows(tournament_id):
+    """(team1_id, team2_id, team1_score, team2_score) of a tournament's scored pool games"""
+    games = (db.session.query(Game.team1_id, Game.team2_id, Game.team1_score, Game.team2_score)
+             .filter(Game.tournament_id == tournament_id,
+                     Game.pool_play(),
+                     Game.status == 'Completed',
+                     Game.team1_score.isnot(None),
+                     Game.team2_score.isnot(None))
+             .all())
+    return [tuple(game) for game in games]
+
+def ranked_team_ids(tournament_id, chain=None):
+    """Team ids of a tournament in rank order under its tiebreaker chain"""
+    if chain is None:
+        chain = tournament_tiebreakers(tournament_id)
+    team_ids, stats = team_stat_arrays(team_stat_rows(tournament_id))
+
+    matrices = None
+    if HEAD_TO_HEAD_KEYS.intersection(chain):
+        matrices = results_matrices(team_ids, completed_game_rows(tournament_id))
+
+    return team_ids[rank_order(team_ids, stats, chain, matrices)].tolist()
@@ -0,0 +1,82 @@
+import base64
+from datetime import date, datetime, time
+from sqlalchemy import or_, tuple_
+from models import Game
+
+# Page size bounds for GET /api/schedule?limit=
+MAX_PAGE_SIZE = 500
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def encode_cursor(game):
+    """Opaque cursor pointing just past a game in (date, time, id) order"""
+    key = f"{game['date']}|{game['time']}|{game['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return the (date, time, id) a cursor points past; raises ValueError if it is not one of ours"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        game_date, game_time, game_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return date.fromisoformat(game_date), time.fromisoformat(game_time), int(game_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+def _date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+def _values(args, name):
+    """Comma-separated or repeated query parameter values"""
+    return [value.strip() for raw in args.getlist(name) for value in raw.split(',') if value.strip()]
+
+def parse_schedule_args(args):
+    """Turn GET /api/schedule query parameters into (conditions, cursor, limit).
+
+    Filters: date (one day) or date_from/date_to (inclusive), field, status,
+    exclude_status, game_type (each comma-separated for several values) and
+    team (games either team plays in). limit enables paging; cursor is the
+    X-Next-Cursor of the previous page. Raises ValueError for a bad value.
+    """
+    conditions = []
+    if args.get('date'):
+        conditions.append(Game.date == _date(args['date'], 'date'))
+    if args.get('date_from'):
+        conditions.append(Game.date >= _date(args['date_from'], 'date_from'))
+    if args.get('date_to'):
+        conditions.append(Game.date <= _date(args['date_to'], 'date_to'))
+
+    for name, column in (('field', Game.field), ('status', Game.status), ('game_type', Game.game_type)):
+        values = _values(args, name)
+        if values:
+            conditions.append(column.in_(values))
+    excluded = _values(args, 'exclude_status')
+    if excluded:
+        conditions.append(Game.status.notin_(excluded))
+
+    if args.get('team'):
+        try:
+            team_id = int(args['team'])
+        except ValueError:
+            raise ValueError('team must be a team id')
+        conditions.append(or_(Game.team1_id == team_id, Game.team2_id == team_id))
+
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+
+    limit = None
+    if args.get('limit'):
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    return conditions, cursor, limit
+
+def after_cursor(cursor):
+    """Keyset condition for the games that come after a cursor"""
+    return tuple_(Game.date, Game.time, Game.id) > tuple_(*cursor)
@@ -0,0 +1,139 @@
+import json
+from flask import current_app, jsonify
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from database import db
+from instrumentation import timed_serialization
+from models import Team, Standing, Game, BracketMatch
+
+# Read payloads are built from column tuples rather than ORM objects: one
+# SELECT of exactly the columns a payload needs, no identity map, no
+# attribute instrumentation. Each builder returns the same dicts the
+# models' to_dict methods produce.
+
+def _scoped(column, tournament_id, conditions):
+    """Conditions plus the tournament filter; None skips it for lookups by primary key.
+
+    An id IN (...) lookup is cheapest through the rowid, but SQLite prefers
+    walking the tournament's ORDER BY index whenever the filter is there.
+    The filter is marked likely(): the rows a narrower index finds (a team's
+    games through ix_game_team1_id/ix_game_team2_id) are nearly all in the
+    tournament, so SQLite should take that index over the tournament's.
+    """
+    if tournament_id is None:
+        return tuple(conditions)
+    return (func.likely(column == tournament_id), *conditions)
+
+TEAM_FIELDS = ('id', 'tournament_id', 'name', 'wins', 'losses', 'ties',
+               'runs_scored', 'runs_allowed', 'run_differential', 'games_played')
+
+def team_columns(team=Team):
+    return [getattr(team, field) for field in TEAM_FIELDS]
+
+def _team_dicts(statement):
+    return [dict(zip(TEAM_FIELDS, row)) for row in db.session.execute(statement)]
+
+def teams_statement(tournament_id):
+    return select(*team_columns()).where(Team.tournament_id == tournament_id)
+
+def teams_payload(tournament_id):
+    """Team.to_dict for every team in a tournament"""
+    return _team_dicts(teams_statement(tournament_id))
+
+RANKING_FIELDS = TEAM_FIELDS + ('rank', 'win_percentage', 'points')
+
+def rankings_statement(tournament_id, conditions=()):
+    return (select(*team_columns(), Standing.rank, Standing.win_percentage, Standing.points)
+            .join(Standing, Standing.team_id == Team.id)
+            .where(*_scoped(Standing.tournament_id, tournament_id, conditions))
+            .order_by(Standing.rank))
+
+def rankings_payload(tournament_id, conditions=()):
+    """Teams in standings order, with rank, points and win percentage"""
+    return [dict(zip(RANKING_FIELDS, row))
+            for row in db.session.execute(rankings_statement(tournament_id, conditions))]
+
+GAME_FIELDS = ('id', 'tournament_id', 'team1_id', 'team2_id', 'team1_score', 'team2_score',
+               'date', 'time', 'field', 'status', 'game_type', 'bracket_match_id', 'version')
+
+def schedule_statement(tournament_id, conditions=(), limit=None):
+    team1 = aliased(Team)
+    team2 = aliased(Team)
+    return (select(*[getattr(Game, field) for field in GAME_FIELDS], team1.name, team2.name)
+            .outerjoin(team1, team1.id == Game.team1_id)
+            .outerjoin(team2, team2.id == Game.team2_id)
+            .where(*_scoped(Game.tournament_id, tournament_id, conditions))
+            .order_by(Game.date, Game.time, Game.id)
+            .limit(limit))
+
+def schedule_payload(tournament_id, conditions=(), limit=None):
+    """Game.to_dict for the games in a tournament matching conditions, ordered by date, time and id"""
+    games = []
+    for row in db.session.execute(schedule_statement(tournament_id, conditions, limit)):
+        game = dict(zip(GAME_FIELDS, row))
+        game['date'] = game['date'].isoformat() if game['date'] else None
+        game['time'] = game['time'].isoformat() if game['time'] else None
+        game['team1_name'], game['team2_name'] = row[-2], row[-1]
+        games.append(game)
+    return games
+
+def bracket_statement(tournament_id, conditions=()):
+    return (select(BracketMatch.match_display_id, BracketMatch.round_number,
+                   BracketMatch.team1_id, BracketMatch.team2_id,
+                   BracketMatch.team1_score, BracketMatch.team2_score,
+                   BracketMatch.team1_seed, BracketMatch.team2_seed,
+                   BracketMatch.winner_id, BracketMatch.status, BracketMatch.bracket_side)
+            .where(BracketMatch.tournament_id == tournament_id, *conditions)
+            .order_by(BracketMatch.round_number, BracketMatch.match_display_id))
+
+def bracket_matches(tournament_id, conditions=()):
+    """Bracket matches in round order, with the teams' to_dict and seeds"""
+    matches = db.session.execute(bracket_statement(tournament_id, conditions)).all()
+
+    # Load every team referenced by the bracket in a single IN query
+    team_ids = {team_id for match in matches
+                for team_id in (match.team1_id, match.team2_id, match.winner_id) if team_id}
+    teams = {}
+    if team_ids:
+        teams = {team['id']: team
+                 for team in _team_dicts(select(*team_columns()).where(Team.id.in_(team_ids)))}
+
+    payload = []
+    for match in matches:
+        team1 = teams.get(match.team1_id)
+        team2 = teams.get(match.team2_id)
+        winner = teams.get(match.winner_id)
+        payload.append({
+            'matchId': match.match_display_id,
+            'round': match.round_number,
+            'team1': dict(team1, seed=match.team1_seed) if team1 else None,
+            'team2': dict(team2, seed=match.team2_seed) if team2 else None,
+            'team1_score': match.team1_score,
+            'team2_score': match.team2_score,
+            'winner': dict(winner) if winner else None,
+            'status': match.status,
+            'bracket': match.bracket_side
+        })
+    return payload
+
+def bracket_payload(tournament_id):
+    """Bracket matches grouped by round"""
+    rounds = {}
+    for match in bracket_matches(tournament_id):
+        rounds.setdefault(str(match['round']), []).append(match)
+    return rounds
+
+# Same output as Flask's default provider outside debug mode (sorted keys,
+# compact separators, ASCII escapes), with the C encoder built once
+_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+def json_response(payload, status=200):
+    """jsonify for payloads made only of JSON types"""
+    if current_app.debug:
+        # Keep jsonify's indented output while debugging
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    with timed_serialization():
+        body = f'{_encoder.encode(payload)}\n'
+    return current_app.response_class(body, status=status, mimetype=current_app.json.mimetype)
@@ -0,0 +1,306 @@
+import fcntl
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+import numpy as np
+from brackets import bye_seeds
+from database import db
+from models import Team, Game
+from ranking import (HEAD_TO_HEAD_KEYS, tournament_tiebreakers, team_stat_rows, completed_game_rows,
+                     team_stat_table, team_stat_columns, results_matrices, rank_order)
+
+# Simulated rest-of-pool-play seasons per request, and the most a request may
+# ask for; anyone can call the endpoint, so both stay modest
+DEFAULT_SIMULATIONS = 20_000
+MAX_SIMULATIONS = 100_000
+
+# Largest bracket a request may ask the odds of; fields beyond the
+# tournament's teams are cut to them
+MAX_BRACKET_TEAMS = 1024
+
+# Processes sharing one simulation's seasons; 0 simulates them in the request's own process
+SIMULATION_PROCESSES = int(os.environ.get('SIMULATION_PROCESSES', 2))
+
+# Simulations running at once on the whole server, every Gunicorn worker
+# together. Each holds a slot (a locked file in SIMULATION_LOCK_DIR), so at
+# most SIMULATION_SLOTS * SIMULATION_PROCESSES pool processes ever exist.
+SIMULATION_SLOTS = int(os.environ.get('SIMULATION_SLOTS', 1))
+SIMULATION_LOCK_DIR = os.environ.get('SIMULATION_LOCK_DIR', tempfile.gettempdir())
+
+# Seconds after which batches that have not started are dropped. Large pools
+# (or head-to-head tiebreakers, which cost teams^2 per season) then report
+# fewer simulations instead of holding the request. A request also waits at
+# most this long for a free slot.
+SIMULATION_TIME_LIMIT = float(os.environ.get('SIMULATION_TIME_LIMIT', 2))
+
+# How often a request waiting for a slot tries again
+SLOT_POLL_INTERVAL = 0.05
+
+# Seasons per vectorized batch; each batch is one task for the process pool
+BATCH_SIZE = 5_000
+
+# Cap on the cells of a batch's (seasons x games) and (seasons x teams x
+# teams) arrays, so a large pool gets smaller batches instead of gigabytes
+BATCH_CELLS = 8_000_000
+
+# Largest games x columns matrix used to sum results per team with one matrix
+# product; it travels with every batch, so bigger pools use np.add.reduceat
+FOLD_CELLS = 100_000
+
+# Seeds reported per team (more when the bracket is larger); the expected
+# seed still counts every seed
+REPORTED_SEEDS = 64
+
+# Runs per team and game assumed before any game has been scored
+DEFAULT_RUNS_PER_GAME = 5.0
+
+# League-average games blended into each team's scoring and allowing rates,
+# so one blowout does not make a team a juggernaut
+PRIOR_GAMES = 3
+
+def scoring_rates(table, team1, team2):
+    """Expected runs of each side of each game from the teams' runs per game so far.
+
+    A team's offense (runs scored per game) and the opponent's defense (runs
+    allowed per game), both relative to the league average, scale the league
+    average: a team that scores 20% more than average against a team that
+    allows 10% more expects 1.2 * 1.1 times the average.
+    """
+    games_played, runs_scored, runs_allowed = table[:, 4], table[:, 5], table[:, 6]
+    league = runs_scored.sum() / games_played.sum() if games_played.sum() > 0 else 0
+    if league <= 0:
+        league = DEFAULT_RUNS_PER_GAME
+    offense = (runs_scored + PRIOR_GAMES * league) / (games_played + PRIOR_GAMES) / league
+    defense = (runs_allowed + PRIOR_GAMES * league) / (games_played + PRIOR_GAMES) / league
+    return league * offense[team1] * defense[team2], league * offense[team2] * defense[team1]
+
+class _ColumnSums:
+    """Adds per-game values of every season into the columns (teams, or
+    head-to-head cells) the two sides of each game belong to, in dtype"""
+
+    def __init__(self, side1, side2, dtype=np.float64):
+        self.dtype = dtype
+        index = np.concatenate([side1, side2])
+        self.columns, slots = np.unique(index, return_inverse=True)
+        if len(index) * len(self.columns) <= FOLD_CELLS:
+            self.fold = np.eye(len(self.columns), dtype=dtype)[slots]
+        else:
+            self.fold = None
+            self.by_column = np.argsort(slots, kind='stable')
+            self.starts = np.searchsorted(slots[self.by_column], np.arange(len(self.columns)))
+
+    def add(self, played, values1, values2):
+        """played (one value per column) plus each season's values1 and values2 (seasons x games)"""
+        values = np.hstack([values1, values2]).astype(self.dtype, copy=False)
+        totals = np.tile(played.astype(self.dtype, copy=False), (len(values), 1))
+        if self.fold is not None:
+            totals[:, self.columns] += values @ self.fold
+        else:
+            totals[:, self.columns] += np.add.reduceat(values[:, self.by_column], self.starts, axis=1)
+        return totals
+
+def _simulate_batch(model, seasons, seed):
+    """(seed_counts[team, seed - 1] for the reported seeds, sum of each team's seeds)
+    over `seasons` simulated ends of pool play"""
+    rng = np.random.default_rng(seed)
+    table = model['table']
+    size = len(table)
+
+    # One Poisson score per side of every remaining game in every season
+    score1 = rng.poisson(model['rate1'], size=(seasons, len(model['rate1']))).astype(np.float64)
+    score2 = rng.poisson(model['rate2'], size=(seasons, len(model['rate2']))).astype(np.float64)
+    margin = score1 - score2
+    win1, win2, tie = (margin > 0) * 1.0, (margin < 0) * 1.0, (margin == 0) * 1.0
+
+    # Each counter is the stored one plus the season's games, summed per team
+    teams = model['teams']
+    games_played = np.ones_like(tie)
+    stats = team_stat_columns(
+        teams.add(table[:, 1], win1, win2),
+        teams.add(table[:, 2], win2, win1),
+        teams.add(table[:, 3], tie, tie),
+        teams.add(table[:, 4], games_played, games_played),
+        teams.add(table[:, 5], score1, score2),
+        teams.add(table[:, 6], score2, score1),
+        teams.add(table[:, 7], margin, -margin)
+    )
+
+    matrices = None
+    if model['matrices'] is not None:
+        # Head-to-head matrices per season: the played games plus this
+        # season's, with only the cells of the remaining pairings changing
+        matrices = [
+            model['cells'].add(played.ravel(), results1, results2).reshape(seasons, size, size)
+            for played, (results1, results2) in zip(model['matrices'],
+                                                    ((2 * win1 + tie, 2 * win2 + tie), (margin, -margin)))
+        ]
+
+    # The seeding order generate_bracket would use at the end of each season
+    order = rank_order(model['team_ids'], stats, model['chain'], matrices)
+    reported = model['reported_seeds']
+    counts = np.bincount((order[:, :reported] * reported + np.arange(reported)).ravel(),
+                         minlength=size * reported).reshape(size, reported)
+    seed_sums = np.bincount(order.ravel(), weights=np.tile(np.arange(1, size + 1), seasons), minlength=size)
+    return counts, seed_sums
+
+class SimulatorBusy(Exception):
+    """Every simulation slot stayed taken for SIMULATION_TIME_LIMIT"""
+
+@contextmanager
+def _simulation_slot():
+    """Hold one of the server's SIMULATION_SLOTS while the block runs.
+
+    A slot is an flock on its own file, so every process competes for the
+    same slots and a process that dies gives its slot back.
+    """
+    deadline = time.monotonic() + SIMULATION_TIME_LIMIT
+    while True:
+        for slot in range(SIMULATION_SLOTS):
+            lock_file = open(os.path.join(SIMULATION_LOCK_DIR, f'tournament-simulation-{slot}.lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            try:
+                yield
+            finally:
+                lock_file.close()
+            return
+        if time.monotonic() > deadline:
+            raise SimulatorBusy('The seeding simulator is busy; try again in a moment')
+        time.sleep(SLOT_POLL_INTERVAL)
+
+def _start_pool():
+    """A process pool for one simulation.
+
+    Pool processes fork from a forkserver that has imported only this
+    module, not from the worker (whose request threads may hold locks).
+    They still import the main module again, which is harmless under
+    Gunicorn; `python app.py` therefore runs with SIMULATION_PROCESSES = 0.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+    else:
+        context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=SIMULATION_PROCESSES, mp_context=context)
+
+def _run_batches(tasks):
+    """Results of the (model, seasons, seed) batches that finished within SIMULATION_TIME_LIMIT (at least one)"""
+    deadline = time.monotonic() + SIMULATION_TIME_LIMIT
+    if SIMULATION_PROCESSES == 0 or len(tasks) == 1:
+        results = []
+        for task in tasks:
+            if results and time.monotonic() > deadline:
+                break
+            results.append(_simulate_batch(*task))
+        return results
+
+    # The pool lives only as long as the simulation, so processes are only
+    # held while a slot is
+    with _start_pool() as executor:
+        futures = [executor.submit(_simulate_batch, *task) for task in tasks]
+        done, pending = wait(futures, timeout=SIMULATION_TIME_LIMIT)
+        if not done:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        for future in pending:
+            # Batches already running finish before the pool shuts down; the rest never start
+            future.cancel()
+    return [future.result() for future in done]
+
+def remaining_pool_games(tournament_id):
+    """(team1_id, team2_id) of a tournament's pool games that are still to be played"""
+    return [tuple(game) for game in (
+        db.session.query(Game.team1_id, Game.team2_id)
+        .filter(Game.tournament_id == tournament_id,
+                Game.status == 'Scheduled',
+                Game.pool_play())
+        .all()
+    )]
+
+def simulate_seeding(tournament_id, simulations=DEFAULT_SIMULATIONS, team_count=6, seed=0):
+    """Seed odds for every team if the remaining pool games were played out `simulations` times.
+
+    Each remaining Scheduled pool game gets Poisson scores from the two
+    teams' scoring rates (see scoring_rates); the season's standings are then
+    ranked with the tournament's tiebreaker chain, exactly as
+    generate_bracket seeds. Batches of seasons run on a process pool; the
+    same seed gives the same odds whatever the number of processes. Batches
+    not started within SIMULATION_TIME_LIMIT are dropped, and "simulations"
+    counts the seasons actually played. Raises SimulatorBusy if no
+    simulation slot frees up within SIMULATION_TIME_LIMIT.
+
+    Returns {"simulations", "remaining_games", "bracket_teams", "bye_seeds",
+    "teams"}; teams are in current seeding order, each with its
+    current_seed, seed_odds (the probability of each seed, 1 first, for
+    the first REPORTED_SEEDS seeds or the whole bracket), expected_seed, and the probabilities of making the team_count-team
+    bracket (in_bracket) and of a first-round bye (bye). A team_count above
+    the tournament's number of teams is cut to it (bracket_teams).
+    """
+    chain = tournament_tiebreakers(tournament_id)
+    table = team_stat_table(team_stat_rows(tournament_id))
+    team_ids = table[:, 0].astype(np.int64)
+    names = dict(db.session.query(Team.id, Team.name).filter(Team.tournament_id == tournament_id).all())
+
+    # Games against a team of another tournament (or a deleted one) cannot count
+    games = np.array(remaining_pool_games(tournament_id), dtype=np.float64).reshape(-1, 2)
+    games = games[np.isin(games, team_ids).all(axis=1) & (games[:, 0] != games[:, 1])].astype(np.int64)
+    team1, team2 = np.searchsorted(team_ids, games[:, 0]), np.searchsorted(team_ids, games[:, 1])
+
+    matrices = None
+    if HEAD_TO_HEAD_KEYS.intersection(chain):
+        matrices = results_matrices(team_ids, completed_game_rows(tournament_id))
+    current = rank_order(team_ids, team_stat_columns(*table[:, 1:].T), chain, matrices)
+
+    size = len(team_ids)
+    team_count = min(team_count, size)
+    rate1, rate2 = scoring_rates(table, team1, team2)
+    model = {'team_ids': team_ids, 'table': table, 'chain': chain, 'matrices': matrices,
+             'rate1': rate1, 'rate2': rate2, 'teams': _ColumnSums(team1, team2),
+             # float32 holds head-to-head sums exactly and halves the memory
+             # the tiebreaker passes stream through
+             'cells': (_ColumnSums(team1 * size + team2, team2 * size + team1, np.float32)
+                       if matrices is not None else None),
+             'reported_seeds': min(size, max(REPORTED_SEEDS, team_count))}
+    cells_per_season = max(2 * len(games), size * size if matrices is not None else size, 1)
+    batch_size = max(1, min(BATCH_SIZE, BATCH_CELLS // cells_per_season))
+    batches = [min(batch_size, simulations - start) for start in range(0, simulations, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    tasks = [(model, seasons, batch_seed) for seasons, batch_seed in zip(batches, seeds)]
+
+    counts = np.zeros((size, model['reported_seeds']), dtype=np.int64)
+    seed_sums = np.zeros(size)
+    if size:
+        with _simulation_slot():
+            batch_results = _run_batches(tasks)
+        for batch_counts, batch_seed_sums in batch_results:
+            counts += batch_counts
+            seed_sums += batch_seed_sums
+        # Every season hands out seed 1 once
+        simulations = int(counts[:, 0].sum())
+
+    odds = counts / simulations
+    byes = [seed_number - 1 for seed_number in bye_seeds(team_count)] if team_count >= 2 else []
+    teams = []
+    for current_seed, index in enumerate(current.tolist(), start=1):
+        team_id = int(team_ids[index])
+        teams.append({
+            'id': team_id,
+            'name': names.get(team_id),
+            'current_seed': current_seed,
+            'seed_odds': np.round(odds[index], 4).tolist(),
+            'expected_seed': round(float(seed_sums[index] / simulations), 2),
+            'in_bracket': round(float(odds[index, :team_count].sum()), 4),
+            'bye': round(float(odds[index, byes].sum()), 4),
+        })
+    return {
+        'simulations': simulations,
+        'remaining_games': len(games),
+        'bracket_teams': team_count,
+        'bye_seeds': [index + 1 for index in byes],
+        'teams': teams
+    }
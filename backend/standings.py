@@ -0,0 +1,176 @@
+from collections import defaultdict
+from sqlalchemy import case, func, select, union_all, update
+from changes import record_changes
+from database import db
+from models import Team, Standing, Game
+from ranking import ranked_team_ids
+
+# Counters that can be recomputed from completed Game rows
+STAT_FIELDS = ['games_played', 'wins', 'losses', 'ties', 'runs_scored', 'runs_allowed', 'run_differential']
+
+def calculate_points(wins, ties):
+    """Points: 2 for a win, 1 for a tie, 0 for a loss"""
+    return (2 * (wins or 0)) + (1 * (ties or 0))
+
+def calculate_win_percentage(wins, games_played):
+    if games_played and games_played > 0:
+        return round((wins or 0) / games_played, 3)
+    return 0.0
+
+def _add_result(totals, scored, allowed, sign):
+    totals['games_played'] += sign
+    totals['runs_scored'] += sign * scored
+    totals['runs_allowed'] += sign * allowed
+    totals['run_differential'] += sign * (scored - allowed)
+    if scored > allowed:
+        totals['wins'] += sign
+    elif scored < allowed:
+        totals['losses'] += sign
+    else:
+        totals['ties'] += sign
+
+def new_team_deltas():
+    """Per-team counter deltas, keyed by team id"""
+    return defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+def fold_score_change(deltas, team1_id, team2_id, old, new):
+    """Fold one game's score change into per-team counter deltas.
+    
+    `old` and `new` are (team1_score, team2_score, status) tuples. A game only
+    counts toward team stats while it is Completed with both scores set, so a
+    re-scored game first reverses its previous result and then applies the new one.
+    """
+    for (team1_score, team2_score, status), sign in ((old, -1), (new, 1)):
+        if status != 'Completed' or team1_score is None or team2_score is None:
+            continue
+        _add_result(deltas[team1_id], team1_score, team2_score, sign)
+        _add_result(deltas[team2_id], team2_score, team1_score, sign)
+    return deltas
+
+def apply_team_deltas(deltas):
+    """Apply folded deltas with one UPDATE per affected team"""
+    for team_id, totals in deltas.items():
+        values = {
+            field: func.coalesce(getattr(Team, field), 0) + delta
+            for field, delta in totals.items()
+            if delta
+        }
+        if values:
+            db.session.execute(update(Team).where(Team.id == team_id).values(**values))
+
+def refresh_standings(tournament_id, team_ids=None):
+    """Recompute the standings rows for the given teams (or every team in the tournament) and re-rank.
+    
+    Must be called inside the transaction that changed the team counters so the
+    standings table commits together with them.
+    """
+    db.session.flush()
+    
+    query = (db.session.query(Team.id, Team.wins, Team.ties, Team.games_played)
+             .filter(Team.tournament_id == tournament_id))
+    if team_ids is not None:
+        team_ids = [team_id for team_id in team_ids if team_id is not None]
+        if not team_ids:
+            return
+        query = query.filter(Team.id.in_(team_ids))
+    
+    existing_query = Standing.query.filter(Standing.tournament_id == tournament_id)
+    if team_ids is not None:
+        existing_query = existing_query.filter(Standing.team_id.in_(team_ids))
+    existing = {standing.team_id: standing for standing in existing_query.all()}
+    
+    refreshed = query.all()
+    # Their counters changed with the standings, so the change log covers both
+    record_changes('team', [row.id for row in refreshed], tournament_id=tournament_id)
+    for team_id, wins, ties, games_played in refreshed:
+        standing = existing.get(team_id)
+        if standing is None:
+            standing = Standing(team_id=team_id, tournament_id=tournament_id)
+            db.session.add(standing)
+        standing.points = calculate_points(wins, ties)
+        standing.win_percentage = calculate_win_percentage(wins, games_played)
+    
+    rerank_standings(tournament_id)
+
+def rerank_standings(tournament_id):
+    """Assign 1-based ranks within a tournament using its tiebreaker chain"""
+    db.session.flush()
+    
+    current = dict(db.session.query(Standing.team_id, Standing.rank)
+                   .filter(Standing.tournament_id == tournament_id)
+                   .all())
+    ordered = [team_id for team_id in ranked_team_ids(tournament_id) if team_id in current]
+    
+    # Only write the rows whose rank actually moved
+    changes = [
+        {'team_id': team_id, 'rank': index + 1}
+        for index, team_id in enumerate(ordered)
+        if current[team_id] != index + 1
+    ]
+    if changes:
+        db.session.execute(update(Standing), changes)
+        record_changes('team', [change['team_id'] for change in changes], tournament_id=tournament_id)
+
+def rebuild_team_stats(tournament_id, dry_run=False):
+    """Recompute every team's counters in a tournament from its completed games and report the drift.
+    
+    One aggregate query folds both sides of every completed game into per-team
+    totals; the teams whose stored counters differ are written back with a
+    single executemany UPDATE. Scores recorded through POST /games have no Game
+    row and are therefore not part of the rebuilt totals; bracket games never
+    count (see Game.pool_play).
+    """
+    completed = ((Game.tournament_id == tournament_id) & Game.pool_play() & (Game.status == 'Completed')
+                 & Game.team1_score.isnot(None) & Game.team2_score.isnot(None))
+    sides = union_all(
+        select(Game.team1_id.label('team_id'),
+               Game.team1_score.label('scored'),
+               Game.team2_score.label('allowed')).where(completed),
+        select(Game.team2_id.label('team_id'),
+               Game.team2_score.label('scored'),
+               Game.team1_score.label('allowed')).where(completed)
+    ).subquery()
+    totals = select(
+        sides.c.team_id,
+        func.count().label('games_played'),
+        func.sum(case((sides.c.scored > sides.c.allowed, 1), else_=0)).label('wins'),
+        func.sum(case((sides.c.scored < sides.c.allowed, 1), else_=0)).label('losses'),
+        func.sum(case((sides.c.scored == sides.c.allowed, 1), else_=0)).label('ties'),
+        func.sum(sides.c.scored).label('runs_scored'),
+        func.sum(sides.c.allowed).label('runs_allowed')
+    ).group_by(sides.c.team_id)
+    
+    rebuilt = {row.team_id: row for row in db.session.execute(totals)}
+    stored = (db.session.query(Team.id, Team.name, *[getattr(Team, field) for field in STAT_FIELDS])
+              .filter(Team.tournament_id == tournament_id)
+              .all())
+    
+    changes = []
+    updates = []
+    for row in stored:
+        totals_row = rebuilt.get(row.id)
+        expected = {field: 0 for field in STAT_FIELDS}
+        if totals_row is not None:
+            for field in STAT_FIELDS[:-1]:
+                expected[field] = getattr(totals_row, field)
+            expected['run_differential'] = expected['runs_scored'] - expected['runs_allowed']
+        
+        diff = {
+            field: {'stored': getattr(row, field), 'rebuilt': expected[field]}
+            for field in STAT_FIELDS
+            if getattr(row, field) != expected[field]
+        }
+        if diff:
+            changes.append({'team_id': row.id, 'name': row.name, 'fields': diff})
+            updates.append(dict(expected, id=row.id))
+    
+    if updates and not dry_run:
+        db.session.execute(update(Team), updates)
+        refresh_standings(tournament_id, [update_row['id'] for update_row in updates])
+    
+    return {
+        'dry_run': dry_run,
+        'teams_checked': len(stored),
+        'teams_changed': len(changes),
+        'changes': changes
+    }
@@ -0,0 +1,178 @@
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from brackets import build_bracket, bracket_game_time, clear_bracket_rows
+from changes import record_changes, reset_changes
+from database import db
+from events import queue_event
+from jobs import JOB_CHUNK_SIZE, JobFailed, chunks
+from models import Team, Standing, Game, BracketMatch, TournamentSettings
+from ranking import ranked_team_ids
+from serializers import bracket_payload, rankings_payload
+from standings import refresh_standings
+from tournaments import current_tournament_id
+
+# Background job bodies. Each runs in a job thread with the submitting
+# request's tournament, records its progress in its own transactions, and
+# returns what the route used to answer synchronously. Whatever a task leaves
+# uncommitted commits together with its result (see jobs._finish), so a job
+# that writes in one transaction either finishes or changes nothing.
+
+def _queue_standings_event(tournament_id):
+    db.session.flush()
+    queue_event('standings', rankings_payload(tournament_id))
+
+def generate_bracket_task(progress, team_count, bracket_format):
+    """Replace the bracket with a new one seeded by the current standings"""
+    tournament_id = current_tournament_id()
+    plan = build_bracket(team_count, double_elimination=(bracket_format == 'double'))
+
+    # Seed with the same ranking engine and tiebreaker chain as the standings.
+    # The old bracket is replaced in the same transaction, so a failure keeps it.
+    seeded_team_ids = ranked_team_ids(tournament_id)
+    if len(seeded_team_ids) < team_count:
+        raise JobFailed(f"Not enough teams to create a {team_count}-team bracket. Add at least {team_count} teams.")
+    seeded_team_ids = seeded_team_ids[:team_count]
+    clear_bracket_rows(tournament_id)
+    current_date = datetime.now().date()  # Default date for bracket games
+
+    # Turn the plan into rows; matches whose teams are both known are scheduled now
+    match_rows = []
+    game_rows = []
+    for match in plan:
+        team1_id = seeded_team_ids[match['team1_seed'] - 1] if match['team1_seed'] else None
+        team2_id = seeded_team_ids[match['team2_seed'] - 1] if match['team2_seed'] else None
+        ready = team1_id is not None and team2_id is not None
+        match_rows.append(dict(
+            match,
+            tournament_id=tournament_id,
+            team1_id=team1_id,
+            team2_id=team2_id,
+            team1_score=None,
+            team2_score=None,
+            winner_id=None,
+            status='Scheduled' if ready else 'Pending'
+        ))
+        if ready:
+            game_rows.append({
+                'tournament_id': tournament_id,
+                'team1_id': team1_id,
+                'team2_id': team2_id,
+                'team1_score': None,
+                'team2_score': None,
+                'date': current_date,
+                'time': bracket_game_time(len(game_rows)),
+                'field': 'Bracket Field',
+                'status': 'Scheduled',
+                'game_type': 'Bracket',
+                'bracket_match_id': match['match_display_id']
+            })
+    progress.set_total(len(match_rows) + len(game_rows))
+
+    # One executemany insert per chunk (render_nulls keeps rows with and
+    # without seeds in the same batch)
+    for chunk in chunks(match_rows):
+        db.session.execute(insert(BracketMatch).execution_options(render_nulls=True), chunk)
+        record_changes('bracket_match', [match['match_display_id'] for match in chunk])
+        progress.advance(len(chunk))
+    for chunk in chunks(game_rows):
+        record_changes('game', db.session.execute(insert(Game).returning(Game.id), chunk).scalars())
+        progress.advance(len(chunk))
+
+    rounds = bracket_payload(tournament_id)
+    queue_event('bracket', {'rounds': rounds})
+    queue_event('schedule', {'reason': 'bracket'})
+    return {'rounds': rounds}
+
+def _delete_in_chunks(progress, model, tournament_id, before_delete=None):
+    """Delete a tournament's rows of model one chunk of ids per transaction"""
+    while True:
+        ids = db.session.execute(
+            select(model.id).where(model.tournament_id == tournament_id).limit(JOB_CHUNK_SIZE)
+        ).scalars().all()
+        if not ids:
+            return
+        if before_delete is not None:
+            before_delete(ids)
+        db.session.execute(delete(model).where(model.id.in_(ids)))
+        progress.advance(len(ids))
+        db.session.commit()
+
+def reset_tournament_task(progress):
+    """Clear the tournament's teams, games, bracket and standings, keeping its settings record"""
+    tournament_id = current_tournament_id()
+    progress.set_total(sum(
+        db.session.execute(select(func.count()).select_from(model).where(model.tournament_id == tournament_id)).scalar()
+        for model in (Game, BracketMatch, Team)
+    ))
+    db.session.commit()
+
+    # Games and bracket matches reference teams, so they go first
+    _delete_in_chunks(progress, Game, tournament_id)
+    _delete_in_chunks(progress, BracketMatch, tournament_id)
+    _delete_in_chunks(progress, Team, tournament_id, before_delete=lambda team_ids: db.session.execute(
+        delete(Standing).where(Standing.team_id.in_(team_ids))
+    ))
+
+    # Reset tournament settings to default (but keep the record)
+    settings = db.session.get(TournamentSettings, tournament_id)
+    if settings:
+        settings.name = "Baseball Tournament"
+        settings.description = ""
+        # Keep the admin password as is
+
+    reset_changes(tournament_id)
+    queue_event('reset', {})
+    db.session.commit()
+    return {"message": "Tournament successfully reset to initial state"}
+
+def import_teams_task(progress, values):
+    """Insert validated team rows in one transaction: all of them or none"""
+    tournament_id = current_tournament_id()
+    progress.set_total(len(values))
+    db.session.commit()
+
+    new_ids = []
+    for chunk in chunks(values):
+        # executemany-style insert that hands back the new ids in row order
+        chunk_ids = db.session.execute(
+            insert(Team).returning(Team.id, sort_by_parameter_order=True), chunk
+        ).scalars().all()
+        refresh_standings(tournament_id, chunk_ids)
+        queue_event('teams', {'created': chunk_ids})
+        progress.advance(len(chunk))
+        new_ids += chunk_ids
+    _queue_standings_event(tournament_id)
+
+    results = [
+        {'row': index + 1, 'id': team_id, 'name': team_values['name']}
+        for index, (team_id, team_values) in enumerate(zip(new_ids, values))
+    ]
+    return {"created": len(results), "results": results}
+
+def import_games_task(progress, values):
+    """Insert validated game rows in one transaction: all of them or none"""
+    tournament_id = current_tournament_id()
+    progress.set_total(len(values))
+    db.session.commit()
+
+    # Teams may have been deleted since the request validated the rows. The
+    # write transaction starts here, so none can go before the games are in.
+    team_ids = {row[side] for row in values for side in ('team1_id', 'team2_id')}
+    missing = team_ids - set(db.session.execute(
+        select(Team.id).where(Team.tournament_id == tournament_id, Team.id.in_(team_ids))
+    ).scalars())
+    if missing:
+        raise JobFailed(f'Teams no longer exist: {", ".join(map(str, sorted(missing)))}; no games were imported')
+
+    new_ids = []
+    for chunk in chunks(values):
+        chunk_ids = db.session.execute(
+            insert(Game).returning(Game.id, sort_by_parameter_order=True), chunk
+        ).scalars().all()
+        record_changes('game', chunk_ids)
+        progress.advance(len(chunk))
+        new_ids += chunk_ids
+    queue_event('schedule', {'reason': 'import', 'created': len(new_ids)})
+
+    results = [{'row': index + 1, 'id': game_id} for index, game_id in enumerate(new_ids)]
+    return {"created": len(results), "results": results}
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import pytest
+from sqlalchemy import event
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The app reads these when it is imported: a throwaway database file (a real
+# file, so the writer and read-only pools behave as in production), jobs and
+# simulations run inside the request that starts them, and simulation slots
+# do not compete with a server running on the same machine.
+TEST_DIR = tempfile.mkdtemp(prefix='tournament-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ['JOB_WORKERS'] = '0'
+os.environ['SIMULATION_PROCESSES'] = '0'
+os.environ['SIMULATION_LOCK_DIR'] = TEST_DIR
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def new_tournament(client):
+    """Create an empty tournament and return the headers that scope requests to it"""
+    def create(name='Test tournament'):
+        from tournaments import TOURNAMENT_HEADER
+        response = client.post('/api/tournaments', json={'name': name})
+        assert response.status_code == 201
+        return {TOURNAMENT_HEADER: str(response.get_json()['id'])}
+    return create
+
+@pytest.fixture
+def add_teams(client):
+    """Add count teams to a tournament through the bulk import and return their ids in ascending order"""
+    def add(headers, count):
+        response = client.post('/api/teams/bulk', json=[{'name': f'Team {n}'} for n in range(count)],
+                               headers=headers)
+        assert response.get_json()['status'] == 'succeeded'
+        return sorted(team['id'] for team in client.get('/api/teams', headers=headers).get_json())
+    return add
+
+@pytest.fixture
+def count_statements(app):
+    """Run a callable and return (its result, the number of SQL statements it executed)"""
+    from database import db
+
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count)
+
+    def run(call):
+        counter[0] = 0
+        result = call()
+        return result, counter[0]
+
+    yield run
+    for engine in engines:
+        event.remove(engine, 'before_cursor_execute', count)
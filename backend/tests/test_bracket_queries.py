@@ -0,0 +1,19 @@
+def _tournament_with_bracket(client, new_tournament, add_teams, team_count):
+    headers = new_tournament(f'{team_count}-team bracket')
+    add_teams(headers, team_count)
+    response = client.post('/brackets/generate', json={'teams': team_count, 'format': 'double'}, headers=headers)
+    assert response.get_json()['status'] == 'succeeded'
+    return headers
+
+def test_get_brackets_runs_a_fixed_number_of_queries(client, new_tournament, add_teams, count_statements):
+    """GET /brackets loads matches and teams in batches, whatever the bracket size"""
+    counts = {}
+    for team_count in (4, 32):
+        headers = _tournament_with_bracket(client, new_tournament, add_teams, team_count)
+        response, statements = count_statements(lambda: client.get('/brackets', headers=headers))
+        assert response.status_code == 200
+        matches = sum(len(matches) for matches in response.get_json()['rounds'].values())
+        assert matches >= team_count - 1
+        counts[team_count] = statements
+
+    assert counts[4] == counts[32], counts
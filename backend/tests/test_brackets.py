@@ -0,0 +1,13 @@
+import brackets
+
+def test_oversized_field_is_rejected_before_any_planning(client, new_tournament, add_teams, monkeypatch):
+    headers = new_tournament('Oversized bracket')
+    add_teams(headers, 4)
+
+    def no_planning(*args, **kwargs):
+        raise AssertionError('the request planned a bracket')
+    monkeypatch.setattr(brackets, 'build_bracket', no_planning)
+    for body in ({'teams': 10 ** 9}, {'teams': 1}, {'teams': 2, 'format': 'double'}):
+        response = client.post('/brackets/generate', json=body, headers=headers)
+        assert response.status_code == 400, body
+    assert [job['kind'] for job in client.get('/api/jobs', headers=headers).get_json()] == ['import_teams']
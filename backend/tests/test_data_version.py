@@ -0,0 +1,32 @@
+import changes
+from changes import record_changes, reset_changes
+from data_version import current_data_version
+from database import db
+from models import Team
+from tournaments import TOURNAMENT_HEADER
+
+def test_change_log_writes_are_not_data_changes(app, new_tournament):
+    """The log is written after the data version is bumped, so its own writes must not flag a change
+    that the session would carry into its next transaction"""
+    tournament_id = int(new_tournament('Change log writes')[TOURNAMENT_HEADER])
+    with app.app_context():
+        record_changes('team', [1, 2], deleted=True, tournament_id=tournament_id)
+        reset_changes(tournament_id)
+        changes._write_change_log(db.session)
+        assert 'data_changed' not in db.session.info
+        db.session.rollback()
+
+def test_commit_after_a_logged_write_keeps_the_data_version(app, new_tournament):
+    tournament_id = int(new_tournament('Data version')[TOURNAMENT_HEADER])
+    with app.app_context():
+        team = Team(tournament_id=tournament_id, name='Logged')
+        db.session.add(team)
+        db.session.flush()
+        record_changes('team', [team.id], tournament_id=tournament_id)
+        db.session.commit()
+
+        version = current_data_version()
+        # Nothing written in this transaction
+        db.session.commit()
+        assert current_data_version() == version
+        db.session.commit()
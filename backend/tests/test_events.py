@@ -0,0 +1,70 @@
+import sqlite3
+import events
+from events import broker, follower
+from sqlalchemy.engine import make_url
+from tournaments import TOURNAMENT_HEADER
+
+def _database_path(app):
+    return make_url(app.config['SQLALCHEMY_DATABASE_URI']).database
+
+def test_events_committed_by_another_worker_reach_this_ones_streams(app):
+    """The follower publishes what any process wrote to the event log"""
+    with app.app_context():
+        follower.start()
+    last_id = broker.last_id
+
+    # Another worker's commit: its own connection to the same database file
+    connection = sqlite3.connect(_database_path(app))
+    with connection:
+        connection.execute("INSERT INTO event_log (tournament_id, event_type, payload) VALUES (1, 'game', '{\"id\": 1}')")
+    connection.close()
+
+    received = broker.wait_for_events(last_id, timeout=5)
+    assert [(event_type, payload) for _, event_type, payload, _ in received] == [('game', '{"id": 1}')]
+
+def test_event_log_keeps_the_newest_events(app, client, new_tournament, monkeypatch):
+    monkeypatch.setattr(events, 'EVENT_HISTORY', 3)
+    headers = new_tournament('Event log')
+    for n in range(5):
+        assert client.post('/api/teams', json={'name': f'Team {n}'}, headers=headers).status_code == 201
+
+    connection = sqlite3.connect(_database_path(app))
+    ids = [row[0] for row in connection.execute('SELECT id FROM event_log ORDER BY id')]
+    connection.close()
+    assert len(ids) == 3
+    assert ids == list(range(ids[0], ids[0] + 3))
+
+def test_streams_past_the_limit_get_503(client, monkeypatch):
+    monkeypatch.setattr(events, 'EVENT_STREAM_LIMIT', broker.subscribers + 1)
+    stream = client.get('/api/events')
+    assert stream.status_code == 200
+    refused = client.get('/api/events')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '30'
+
+    # Closing a stream gives its place back
+    stream.close()
+    again = client.get('/api/events')
+    assert again.status_code == 200
+    again.close()
+
+def test_event_stream_server_streams_the_apis_commits(app, client, new_tournament):
+    """A stream on the event stream server gets what the API commits"""
+    from events_app import app as events_app
+
+    headers = new_tournament('Stream server')
+    with app.app_context():
+        follower.start()
+    follower.poll()
+    last_id = broker.last_id
+    assert client.post('/api/teams', json={'name': 'Streamed'}, headers=headers).status_code == 201
+
+    stream = events_app.test_client().get(f"/api/events?tournament_id={headers[TOURNAMENT_HEADER]}",
+                                          headers={'Last-Event-ID': str(last_id)}, buffered=False)
+    assert stream.status_code == 200
+    assert stream.mimetype == 'text/event-stream'
+    chunks = iter(stream.response)
+    assert next(chunks) == b'retry: 3000\n\n'
+    event = next(chunks).decode()
+    assert 'event: team\n' in event and '"Streamed"' in event
+    stream.close()
@@ -0,0 +1,58 @@
+import app as app_module
+import jobs
+import tasks
+from sqlalchemy import delete
+from database import db
+from models import Team, Standing
+
+def _game_rows(team_ids, count):
+    return [{'team1_id': team_ids[0], 'team2_id': team_ids[1 + n % (len(team_ids) - 1)],
+             'date': '2026-06-01', 'time': '10:00', 'field': f'Field {n}'} for n in range(count)]
+
+def test_failed_import_inserts_nothing(client, new_tournament, add_teams, monkeypatch):
+    """A job that fails after some chunks went in rolls all of them back"""
+    headers = new_tournament('Failed import')
+    team_ids = add_teams(headers, 3)
+    monkeypatch.setattr(jobs, 'JOB_CHUNK_SIZE', 2)
+    calls = []
+    def fail_on_third_chunk(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 3:
+            raise RuntimeError('worker went away')
+    monkeypatch.setattr(tasks, 'record_changes', fail_on_third_chunk)
+
+    job = client.post('/api/schedule/bulk', json=_game_rows(team_ids, 6), headers=headers).get_json()
+    assert job['status'] == 'failed'
+    assert client.get('/api/schedule', headers=headers).get_json() == []
+
+def test_games_import_rechecks_teams_in_the_job(client, new_tournament, add_teams, monkeypatch):
+    """A team deleted between validation and the job fails the import instead of orphaning games"""
+    headers = new_tournament('Team deleted mid-import')
+    team_ids = add_teams(headers, 3)
+
+    validate = app_module.validate_game_rows
+    def validate_then_delete(rows, tournament_id):
+        result = validate(rows, tournament_id)
+        db.session.execute(delete(Standing).where(Standing.team_id == team_ids[2]))
+        db.session.execute(delete(Team).where(Team.id == team_ids[2]))
+        db.session.commit()
+        return result
+    monkeypatch.setattr(app_module, 'validate_game_rows', validate_then_delete)
+
+    job = client.post('/api/schedule/bulk', json=_game_rows(team_ids, 4), headers=headers).get_json()
+    assert job['status'] == 'failed'
+    assert str(team_ids[2]) in job['error']
+    assert client.get('/api/schedule', headers=headers).get_json() == []
+
+def test_failed_bracket_generation_keeps_the_old_bracket(client, new_tournament, add_teams, monkeypatch):
+    headers = new_tournament('Bracket kept')
+    add_teams(headers, 4)
+    assert client.post('/brackets/generate', json={'teams': 4}, headers=headers).get_json()['status'] == 'succeeded'
+    before = client.get('/brackets', headers=headers).get_json()
+
+    # Fewer teams rank than the route counted (say, one was deleted in between)
+    ranked = tasks.ranked_team_ids
+    monkeypatch.setattr(tasks, 'ranked_team_ids', lambda tournament_id: ranked(tournament_id)[:3])
+    job = client.post('/brackets/generate', json={'teams': 4}, headers=headers).get_json()
+    assert job['status'] == 'failed'
+    assert client.get('/brackets', headers=headers).get_json() == before
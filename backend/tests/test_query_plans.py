@@ -0,0 +1,12 @@
+from query_plans import check_query_plans
+
+def test_no_hot_statement_scans_a_table(app, client, new_tournament):
+    """Every statement behind the hot routes is planned on an index, the team filter on the team indexes"""
+    results = check_query_plans(app, client, new_tournament('Query plans'))
+
+    scans = [(name, statement, plan) for name, statement, plan, ok in results if not ok]
+    assert scans == []
+    team_plan = next(plan for name, statement, plan, ok in results
+                     if name == 'get_schedule team' and 'FROM game' in statement)
+    assert any('ix_game_team1_id' in detail for detail in team_plan), team_plan
+    assert any('ix_game_team2_id' in detail for detail in team_plan), team_plan
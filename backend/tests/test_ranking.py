@@ -0,0 +1,21 @@
+from ranking import completed_game_rows
+from tournaments import TOURNAMENT_HEADER
+
+def test_head_to_head_ignores_bracket_games(app, client, new_tournament, add_teams):
+    """Tiebreakers see the pool games only, like the team stats they break ties in"""
+    headers = new_tournament('Head to head')
+    team_ids = add_teams(headers, 4)
+    game = client.post('/api/schedule', json={'team1_id': team_ids[0], 'team2_id': team_ids[1],
+                                              'date': '2026-06-01', 'time': '10:00', 'field': 'Field 1'},
+                       headers=headers).get_json()
+    client.put(f"/api/schedule/{game['id']}/score", json={'team1_score': 7, 'team2_score': 3}, headers=headers)
+
+    response = client.post('/brackets/generate', json={'teams': 4}, headers=headers)
+    assert response.get_json()['status'] == 'succeeded'
+    for match_id in (1, 2):
+        response = client.patch(f'/brackets/match/{match_id}', json={'team1_score': 5, 'team2_score': 2},
+                                headers=headers)
+        assert response.status_code == 200
+
+    with app.app_context():
+        assert completed_game_rows(int(headers[TOURNAMENT_HEADER])) == [(team_ids[0], team_ids[1], 7, 3)]
@@ -0,0 +1,84 @@
+import threading
+
+THREADS = 16
+
+def _hammer(client, requests):
+    """Send (method, url, json, headers) requests from one thread each, all released at once; returns the responses"""
+    barrier = threading.Barrier(len(requests))
+    responses = [None] * len(requests)
+
+    def send(index, method, url, body, headers):
+        barrier.wait()
+        responses[index] = client.open(url, method=method, json=body, headers=headers)
+
+    threads = [threading.Thread(target=send, args=(index, *request)) for index, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+def _setup(client, new_tournament, add_teams, team_count, game_count):
+    headers = new_tournament('Concurrent scoring')
+    team_ids = add_teams(headers, team_count)
+    games = [
+        client.post('/api/schedule', json={'team1_id': team_ids[0], 'team2_id': team_ids[1 + n % (team_count - 1)],
+                                           'date': '2026-06-01', 'time': '10:00', 'field': f'Field {n}'},
+                    headers=headers).get_json()
+        for n in range(game_count)
+    ]
+    return headers, team_ids, games
+
+def _team(client, headers, team_id):
+    return next(team for team in client.get('/api/teams', headers=headers).get_json() if team['id'] == team_id)
+
+def test_one_game_scored_at_once_counts_exactly_once(client, new_tournament, add_teams):
+    """Scorekeepers racing on the same version: one wins, the rest get 409 and change nothing"""
+    headers, team_ids, (game,) = _setup(client, new_tournament, add_teams, 2, 1)
+    score = {'team1_score': 5, 'team2_score': 3, 'version': game['version']}
+    responses = _hammer(client, [('PUT', f"/api/schedule/{game['id']}/score", score, headers)] * THREADS)
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] + [409] * (THREADS - 1)
+    winner, loser = _team(client, headers, team_ids[0]), _team(client, headers, team_ids[1])
+    assert (winner['wins'], winner['losses'], winner['games_played'], winner['runs_scored']) == (1, 0, 1, 5)
+    assert (loser['wins'], loser['losses'], loser['games_played'], loser['runs_scored']) == (0, 1, 1, 3)
+
+    # A re-score from a client that still holds the old version is refused too
+    response = client.put(f"/api/schedule/{game['id']}/score", json={**score, 'team1_score': 0}, headers=headers)
+    assert response.status_code == 409
+    assert _team(client, headers, team_ids[0]) == winner
+
+def test_games_of_one_team_scored_at_once_all_count(client, new_tournament, add_teams):
+    """Different games touching the same team's counters lose no increments"""
+    headers, team_ids, games = _setup(client, new_tournament, add_teams, 5, THREADS)
+    responses = _hammer(client, [
+        ('PUT', f"/api/schedule/{game['id']}/score",
+         {'team1_score': 4, 'team2_score': 1, 'version': game['version']}, headers)
+        for game in games
+    ])
+
+    assert [response.status_code for response in responses] == [200] * THREADS
+    team = _team(client, headers, team_ids[0])
+    assert (team['wins'], team['games_played'], team['runs_scored'], team['runs_allowed']) == \
+        (THREADS, THREADS, 4 * THREADS, THREADS)
+    report = client.post('/api/standings/rebuild', json={'dry_run': True}, headers=headers).get_json()
+    assert report['teams_changed'] == 0, report
+
+def test_game_edited_at_once_is_changed_exactly_once(client, new_tournament, add_teams):
+    """Schedule edits racing on the same version: one wins, the rest get 409 with the game as it is now"""
+    headers, team_ids, (game,) = _setup(client, new_tournament, add_teams, 2, 1)
+    edit = {'field': 'Field 9', 'version': game['version']}
+    responses = _hammer(client, [('PUT', f"/api/schedule/{game['id']}", edit, headers)] * THREADS)
+
+    assert sorted(response.status_code for response in responses) == [200] + [409] * (THREADS - 1)
+    current = client.get('/api/schedule', headers=headers).get_json()[0]
+    assert current['version'] != game['version']
+    for response in responses:
+        if response.status_code == 409:
+            assert response.get_json()['game'] == current
+
+    # An edit from a client that still holds the old version is refused and changes nothing
+    response = client.put(f"/api/schedule/{game['id']}", json={**edit, 'field': 'Field 1'}, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()['game'] == current
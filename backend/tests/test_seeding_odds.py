@@ -0,0 +1,39 @@
+import simulation
+
+def _pool(client, new_tournament, add_teams):
+    headers = new_tournament('Seeding odds')
+    team_ids = add_teams(headers, 4)
+    response = client.post('/api/schedule/bulk', json=[
+        {'team1_id': team1_id, 'team2_id': team2_id, 'date': '2026-06-01', 'time': '10:00', 'field': 'Field 1'}
+        for team1_id in team_ids for team2_id in team_ids if team1_id < team2_id
+    ], headers=headers)
+    assert response.get_json()['status'] == 'succeeded'
+    return headers
+
+def test_seeding_odds_add_up(client, new_tournament, add_teams):
+    headers = _pool(client, new_tournament, add_teams)
+    odds = client.get('/api/standings/seeding-odds?simulations=2000&teams=4', headers=headers).get_json()
+    assert odds['simulations'] == 2000
+    assert odds['remaining_games'] == 6
+    for seed in range(4):
+        assert abs(sum(team['seed_odds'][seed] for team in odds['teams']) - 1) < 1e-3
+
+def test_bracket_size_is_bounded(client, new_tournament, add_teams):
+    headers = _pool(client, new_tournament, add_teams)
+    response = client.get('/api/standings/seeding-odds?simulations=100&teams=1000000', headers=headers)
+    assert response.status_code == 400
+    # More teams than the tournament has: the bracket is the whole field, so nobody gets a bye
+    odds = client.get('/api/standings/seeding-odds?simulations=100&teams=8', headers=headers).get_json()
+    assert (odds['bracket_teams'], odds['bye_seeds']) == (4, [])
+    assert all(team['in_bracket'] == 1 for team in odds['teams'])
+
+def test_busy_simulator_answers_503(client, new_tournament, add_teams, monkeypatch):
+    """With every slot held (here by the test itself), requests give up instead of queueing"""
+    headers = _pool(client, new_tournament, add_teams)
+    monkeypatch.setattr(simulation, 'SIMULATION_TIME_LIMIT', 0.1)
+    url = '/api/standings/seeding-odds?simulations=1000&seed=1'
+    with simulation._simulation_slot():
+        response = client.get(url, headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert client.get(url, headers=headers).status_code == 200
@@ -0,0 +1,35 @@
+def _teams(client, headers):
+    return {team['id']: team for team in client.get('/api/teams', headers=headers).get_json()}
+
+def test_bracket_games_do_not_count_toward_team_stats(client, new_tournament, add_teams):
+    """Scoring bracket games leaves the counters alone, and the rebuild agrees"""
+    headers = new_tournament('Pool and bracket')
+    team_ids = add_teams(headers, 4)
+    response = client.post('/api/schedule', json={'team1_id': team_ids[0], 'team2_id': team_ids[1],
+                                                  'date': '2026-06-01', 'time': '10:00', 'field': 'Field 1'},
+                           headers=headers)
+    pool_game = response.get_json()
+    response = client.put(f"/api/schedule/{pool_game['id']}/score", json={'team1_score': 7, 'team2_score': 3},
+                          headers=headers)
+    assert response.status_code == 200
+    after_pool = _teams(client, headers)
+
+    response = client.post('/brackets/generate', json={'teams': 4}, headers=headers)
+    assert response.get_json()['status'] == 'succeeded'
+    # Through the bracket, and then through the schedule's scoring endpoints
+    response = client.patch('/brackets/match/1', json={'team1_score': 5, 'team2_score': 2}, headers=headers)
+    assert response.status_code == 200
+    bracket_games = [game for game in client.get('/api/schedule', headers=headers).get_json()
+                     if game['game_type'] == 'Bracket']
+    assert bracket_games
+    response = client.put(f"/api/schedule/{bracket_games[0]['id']}/score",
+                          json={'team1_score': 9, 'team2_score': 8}, headers=headers)
+    assert response.status_code == 200
+    response = client.put('/api/schedule/scores', json=[
+        {'id': game['id'], 'team1_score': 4, 'team2_score': 1, 'status': 'Completed'} for game in bracket_games
+    ], headers=headers)
+    assert response.status_code == 200
+
+    assert _teams(client, headers) == after_pool
+    report = client.post('/api/standings/rebuild', json={'dry_run': True}, headers=headers).get_json()
+    assert report['teams_changed'] == 0, report
@@ -0,0 +1,32 @@
+from flask import g, has_app_context, request
+
+# Tournament used by requests that do not name one, and by databases created
+# before tournaments were scoped
+DEFAULT_TOURNAMENT_ID = 1
+
+# Request header naming the tournament; EventSource cannot set headers, so the
+# query parameter works too
+TOURNAMENT_HEADER = 'X-Tournament-ID'
+TOURNAMENT_PARAM = 'tournament_id'
+
+def tournament_id_from_request():
+    """Read the tournament id from the request header or query string.
+
+    Raises ValueError if the value is not a positive integer.
+    """
+    value = request.headers.get(TOURNAMENT_HEADER) or request.args.get(TOURNAMENT_PARAM)
+    if value in (None, ''):
+        return DEFAULT_TOURNAMENT_ID
+    try:
+        tournament_id = int(value)
+    except ValueError:
+        raise ValueError(f'Invalid tournament id: {value}')
+    if tournament_id < 1:
+        raise ValueError(f'Invalid tournament id: {value}')
+    return tournament_id
+
+def current_tournament_id():
+    """The tournament the current request (or background job) is scoped to"""
+    if has_app_context() and 'tournament_id' in g:
+        return g.tournament_id
+    return DEFAULT_TOURNAMENT_ID
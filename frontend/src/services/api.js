@@ -5,6 +5,9 @@ import axios from 'axios';
 // When set to '/', it uses relative URLs which work both in Docker and in browser
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5001'; // Fallback for local dev
 
+// The live update stream has its own server (VITE_EVENTS_BASE_URL); without one it is the API's
+const EVENTS_BASE_URL = import.meta.env.VITE_EVENTS_BASE_URL || API_BASE_URL;
+
 console.log(`API Base URL: ${API_BASE_URL}`); // Log the URL being used
 
 // Set axios defaults
@@ -20,10 +23,18 @@ const apiClient = axios.create({
   withCredentials: false
 });
 
+// Tournament this browser works with; the backend falls back to tournament 1
+const TOURNAMENT_STORAGE_KEY = 'tournamentId';
+const getTournamentId = () => localStorage.getItem(TOURNAMENT_STORAGE_KEY);
+
 // Add request interceptor to handle requests
 apiClient.interceptors.request.use(
   config => {
-    // You can modify request config here if needed
+    // Scope every request to the selected tournament
+    const tournamentId = getTournamentId();
+    if (tournamentId) {
+      config.headers['X-Tournament-ID'] = tournamentId;
+    }
     return config;
   },
   error => {
@@ -42,14 +53,107 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Event types pushed by the backend's /api/events stream
+const LIVE_EVENT_TYPES = [
+  'game', 'game_deleted', 'schedule', 'team', 'team_deleted', 'teams',
+  'standings', 'bracket', 'reset', 'resync'
+];
+
+// While the server refuses a live update stream (it answers 503 once its
+// stream limit is reached), data is reloaded through the resync handler and
+// the stream retried this often
+const EVENT_FALLBACK_RETRY_MS = 30000;
+
+// How often a background job's status is polled
+const JOB_POLL_INTERVAL_MS = 500;
+
+// Heavy operations answer 202 with a job record. Poll it until it ends and
+// resolve like the old synchronous response (data is the job's result), or
+// reject with the job's error in the usual err.response.data.error shape.
+const waitForJob = async (response) => {
+  let job = response.data;
+  while (job.status === 'queued' || job.status === 'running') {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    job = (await apiClient.get(`/api/jobs/${job.id}`)).data;
+  }
+  if (job.status !== 'succeeded') {
+    const error = new Error(job.error || 'Job failed');
+    error.response = { status: 500, data: { error: job.error, job } };
+    throw error;
+  }
+  return { ...response, data: job.result };
+};
+
 export default {
+  // Subscribe to live change events. `handlers` maps event types to callbacks
+  // that receive the parsed payload. Returns an object with close().
+  subscribeToEvents(handlers) {
+    const baseUrl = EVENTS_BASE_URL.endsWith('/') ? EVENTS_BASE_URL.slice(0, -1) : EVENTS_BASE_URL;
+    // EventSource cannot send headers, so the tournament goes in the query string
+    const tournamentId = getTournamentId();
+    const query = tournamentId ? `?tournament_id=${encodeURIComponent(tournamentId)}` : '';
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const connect = () => {
+      source = new EventSource(`${baseUrl}/api/events${query}`);
+      LIVE_EVENT_TYPES.forEach(type => {
+        if (handlers[type]) {
+          source.addEventListener(type, event => handlers[type](JSON.parse(event.data)));
+        }
+      });
+      source.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (closed || source.readyState !== EventSource.CLOSED) {
+          return;
+        }
+        if (handlers.resync) {
+          handlers.resync({});
+        }
+        retryTimer = setTimeout(connect, EVENT_FALLBACK_RETRY_MS);
+      };
+    };
+    connect();
+
+    return {
+      close() {
+        closed = true;
+        clearTimeout(retryTimer);
+        source.close();
+      }
+    };
+  },
+
+  getTournaments() {
+    return apiClient.get('/api/tournaments');
+  },
+  createTournament(tournamentData) {
+    return apiClient.post('/api/tournaments', tournamentData);
+  },
+  getTournamentId,
+  setTournamentId(tournamentId) {
+    localStorage.setItem(TOURNAMENT_STORAGE_KEY, String(tournamentId));
+  },
+
   getRankings() {
     return apiClient.get('/rankings');
   },
+  // Monte Carlo odds of each bracket seed, e.g. { teams: 6, simulations: 20000 }
+  getSeedingOdds(params = {}) {
+    return apiClient.get('/api/standings/seeding-odds', { params });
+  },
+  // Settings, schedule, rankings and bracket for the home page in one request
+  getHome() {
+    return apiClient.get('/api/home');
+  },
   // We will add other endpoints here later
   addTeam(teamData) {
     return apiClient.post('/api/teams', teamData);
   },
+  addTeamsBulk(teams) {
+    return apiClient.post('/api/teams/bulk', teams).then(waitForJob);
+  },
   addGame(gameData) {
     return apiClient.post('/games', gameData);
   },
@@ -62,8 +166,9 @@ export default {
   updateBracketMatch(matchId, scoreData) {
     return apiClient.patch(`/brackets/match/${matchId}`, scoreData);
   },
-  generateBracket() {
-    return apiClient.post('/brackets/generate');
+  // options: { teams: field size (default 6), format: 'single' | 'double' }
+  generateBracket(options = {}) {
+    return apiClient.post('/brackets/generate', options).then(waitForJob);
   },
   clearBracket() {
     return apiClient.post('/brackets/clear');
@@ -72,8 +177,9 @@ export default {
     return apiClient.delete(`/api/teams/${teamId}`);
   },
   // Schedule API methods
-  getSchedule() {
-    return apiClient.get('/api/schedule');
+  // params: server-side filters and paging (date, status, field, team, limit, cursor, ...)
+  getSchedule(params = {}) {
+    return apiClient.get('/api/schedule', { params });
   },
   getGameById(gameId) {
     return apiClient.get(`/api/schedule/${gameId}`);
@@ -81,6 +187,9 @@ export default {
   createScheduledGame(gameData) {
     return apiClient.post('/api/schedule', gameData);
   },
+  createScheduledGamesBulk(games) {
+    return apiClient.post('/api/schedule/bulk', games).then(waitForJob);
+  },
   updateScheduledGame(gameId, gameData) {
     return apiClient.put(`/api/schedule/${gameId}`, gameData);
   },
@@ -92,9 +201,13 @@ export default {
     return apiClient.put(`/api/schedule/${gameData.id}/score`, {
       team1_score: gameData.team1_score,
       team2_score: gameData.team2_score,
-      status: gameData.status
+      status: gameData.status,
+      version: gameData.version
     });
   },
+  updateGameScores(scores) {
+    return apiClient.put('/api/schedule/scores', scores);
+  },
   // Tournament settings methods
   getSettings() {
     return apiClient.get('/api/settings');
@@ -103,6 +216,9 @@ export default {
     return apiClient.put('/api/settings', settingsData);
   },
   resetTournament() {
-    return apiClient.post('/api/reset');
+    return apiClient.post('/api/reset').then(waitForJob);
+  },
+  getJob(jobId) {
+    return apiClient.get(`/api/jobs/${jobId}`);
   }
 }; 
\ No newline at end of file